@@ -14,9 +14,16 @@ else
     VERSION=$(echo $VERSION | sed -r "s/-([^-]*)-[^-]*$/.dev\1/g")
 fi
 
-cat <<EOF > $ROOT/problemtools/_version.py
+VERSION_FILE=$ROOT/problemtools/_version.py
+CONTENTS=$(cat <<EOF
 # Auto-generated from git changelog, do not edit!
 __version__ = '$VERSION'
 EOF
+)
+
+# Leave the file (and its mtime) alone if the version did not change
+if [ "$(cat $VERSION_FILE 2>/dev/null)" != "$CONTENTS" ]; then
+    echo "$CONTENTS" > $VERSION_FILE
+fi
 
 echo $VERSION
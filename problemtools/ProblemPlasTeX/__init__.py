@@ -82,6 +82,9 @@ class ProblemRenderer(Renderer):
     fileExtension = '.html'
     imageTypes = ['.png', '.jpg', '.jpeg', '.gif']
     vectorImageTypes = ['.svg']
+    _EMPTY_TAG_RE = re.compile(r'(<(?:hr|br|img|link|meta)\b.*?)\s*/?\s*(>)', re.I|re.S)
+    _EMPTY_PARAGRAPH_RE = re.compile(r'<p>\s*</p>', re.I)
+    _EMPTY_CELL_RE = re.compile(r'(<(td|th)\b[^>]*>)\s*(</\2>)', re.I)
 
     def render(self, document):
         templatepaths = [os.path.join(os.path.dirname(__file__), '../templates/html'),
@@ -113,13 +116,12 @@ class ProblemRenderer(Renderer):
         s = Renderer.processFileContent(self, document, s)
 
         # Force XHTML syntax on empty tags
-        s = re.compile(r'(<(?:hr|br|img|link|meta)\b.*?)\s*/?\s*(>)',
-                       re.I|re.S).sub(r'\1 /\2', s)
+        s = ProblemRenderer._EMPTY_TAG_RE.sub(r'\1 /\2', s)
 
         # Remove empty paragraphs
-        s = re.compile(r'<p>\s*</p>', re.I).sub(r'', s)
+        s = ProblemRenderer._EMPTY_PARAGRAPH_RE.sub(r'', s)
 
         # Add a non-breaking space to empty table cells
-        s = re.compile(r'(<(td|th)\b[^>]*>)\s*(</\2>)', re.I).sub(r'\1&nbsp;\3', s)
+        s = ProblemRenderer._EMPTY_CELL_RE.sub(r'\1&nbsp;\3', s)
 
         return s
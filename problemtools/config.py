@@ -2,11 +2,28 @@ import collections
 import os
 import yaml
 
+# The libyaml based loader is only there if PyYAML was built with libyaml
+_SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 
 class ConfigError(Exception):
     pass
 
 
+def safe_load_yaml(stream):
+    """Parse a YAML document like yaml.safe_load does, but using the
+    (much faster) libyaml based loader when PyYAML has been built with
+    it.
+
+    Args:
+        stream: str or file to parse.
+
+    Returns:
+        the parsed document.
+    """
+    return yaml.load(stream, Loader=_SafeLoader)
+
+
 def load_config(configuration_file):
     """Load a problemtools configuration file.
 
@@ -23,7 +40,7 @@ def load_config(configuration_file):
         if os.path.isfile(path):
             try:
                 with open(path, 'r') as config:
-                    new_config = yaml.safe_load(config.read())
+                    new_config = safe_load_yaml(config.read())
             except (yaml.parser.ParserError, yaml.parser.ScannerError) as err:
                 raise ConfigError('Config file %s: failed to parse: %s' % (path, err))
         if res is None:
@@ -3,6 +3,7 @@ This module contains functionality for reading and using configuration
 of programming languages.
 """
 import fnmatch
+import os
 import re
 import string
 
@@ -21,6 +22,7 @@ class Language(object):
     """
 
     __KEYS = ['name', 'priority', 'files', 'shebang', 'compile', 'run']
+    __ID_RE = re.compile('[a-z][a-z0-9]*')
     __VARIABLES = ['path', 'files', 'binary', 'mainfile', 'mainclass', 'Mainclass', 'memlim']
 
     def __init__(self, lang_id, lang_spec):
@@ -31,7 +33,7 @@ class Language(object):
             lang_spec (dict): dictionary containing the specification
                 of the language.
         """
-        if not re.match('[a-z][a-z0-9]*', lang_id):
+        if not Language.__ID_RE.match(lang_id):
             raise LanguageConfigError('Invalid language ID "%s"' % lang_id)
         self.lang_id = lang_id
         self.name = None
@@ -43,18 +45,23 @@ class Language(object):
         self.update(lang_spec)
 
 
-    def get_source_files(self, file_list):
+    def get_source_files(self, file_list, first_lines=None):
         """Given a list of files, determine which ones would be considered
         source files for the language.
 
         Args:
             file_list (list of str): list of file names
+            first_lines (dict): optional cache of the first lines of
+                files, mapping file name to line.  Lines read are
+                added to it, so that it can be shared when checking
+                the same files against several languages.
         """
+        if first_lines is None:
+            first_lines = {}
         return [file_name for file_name in file_list
-                if (any(fnmatch.fnmatch(file_name, glob)
-                        for glob in self.files)
+                if (self.__files_re.match(os.path.normcase(file_name))
                     and
-                    self.__matches_shebang(file_name))]
+                    self.__matches_shebang(file_name, first_lines))]
 
 
     def update(self, values):
@@ -89,8 +96,12 @@ class Language(object):
                 # Compile shebang RE
                 self.shebang = re.compile(value)
             elif key == 'files':
-                # Split glob patterns
+                # Split glob patterns, and combine them into a single
+                # RE equivalent to fnmatch:ing against each of them
                 self.files = value.split()
+                self.__files_re = re.compile('|'.join(
+                    fnmatch.translate(os.path.normcase(glob))
+                    for glob in self.files))
             else:
                 # Other keys, just copy the value
                 self.__dict__[key] = value
@@ -146,12 +157,23 @@ class Language(object):
                    if field is not None)
 
 
-    def __matches_shebang(self, filename):
+    def __matches_shebang(self, filename, first_lines):
         """Check if a file matches the shebang rule for the language."""
         if self.shebang is None:
             return True
-        with open(filename, 'r') as f_in:
-            shebang_line = f_in.readline()
+        shebang_line = first_lines.get(filename)
+        if shebang_line is None:
+            # The kernel only looks at the first 256 bytes for a shebang
+            fd = os.open(filename, os.O_RDONLY)
+            try:
+                head = os.read(fd, 256)
+            finally:
+                os.close(fd)
+            newline = head.find(b'\n')
+            if newline != -1:
+                head = head[:newline + 1]
+            shebang_line = head.decode('utf-8', 'replace')
+            first_lines[filename] = shebang_line
         return self.shebang.search(shebang_line) is not None
 
 
@@ -188,8 +210,11 @@ class Languages(object):
         result = None
         src = []
         prio = 1e99
+        # Several languages share globs (e.g. Python 2 and 3), so only
+        # read the first line of each file once
+        first_lines = {}
         for lang in self.languages.values():
-            lang_src = lang.get_source_files(file_list)
+            lang_src = lang.get_source_files(file_list, first_lines)
             if (len(lang_src), lang.priority) > (len(src), prio):
                 result = lang
                 src = lang_src
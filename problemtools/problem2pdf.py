@@ -29,7 +29,10 @@ def convert(options: argparse.Namespace) -> bool:
 
         params.append(texfile)
 
-        status = subprocess.call(params, stdout=output)
+        # The first pass only has to produce the .aux file, so it can
+        # skip writing the PDF and loading the images that go into it
+        first_params = params if options.nopdf else params[:-1] + ['-draftmode', texfile]
+        status = subprocess.call(first_params, stdout=output)
         if status == 0:
             status = subprocess.call(params, stdout=output)
 
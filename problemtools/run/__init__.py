@@ -4,19 +4,22 @@ Problemtools.
 import re
 import os
 
+from typing import Dict
+
 from .buildrun import BuildRun
 from .checktestdata import Checktestdata
 from .errors import ProgramError
 from .executable import Executable
 from .program import Program
-from .source import SourceCode
+from .source import CompileCache, SourceCode
 from .viva import Viva
 from .tools import get_tool_path, get_tool
 from . import rutil
 
 
 def find_programs(path, pattern='.*', language_config=None, work_dir=None,
-                  include_dir=None, allow_validation_script=False):
+                  include_dir=None, allow_validation_script=False,
+                  compile_cache=None):
     """Find all programs in a directory.
 
     Args:
@@ -41,6 +44,9 @@ def find_programs(path, pattern='.*', language_config=None, work_dir=None,
         allow_validation_script (bool): if true, also looks for
             validation scripts in the Checktestdata and VIVA formats.
 
+        compile_cache (CompileCache): compile cache to use for
+            programs given by source code, or None for no caching.
+
     Returns:
         list of Program instances, all programs found in path.
 
@@ -48,21 +54,23 @@ def find_programs(path, pattern='.*', language_config=None, work_dir=None,
     if not os.path.isdir(path):
         return []
     ret = []
+    name_re = re.compile(pattern)
     for name in sorted(os.listdir(path)):
-        if re.match(pattern, name):
+        if name_re.match(name):
             fullpath = os.path.join(path, name)
             run = get_program(fullpath,
                               language_config=language_config,
                               work_dir=work_dir,
                               include_dir=include_dir,
-                              allow_validation_script=allow_validation_script)
+                              allow_validation_script=allow_validation_script,
+                              compile_cache=compile_cache)
             if run is not None:
                 ret.append(run)
     return ret
 
 
 def get_program(path, language_config=None, work_dir=None, include_dir=None,
-                allow_validation_script=False):
+                allow_validation_script=False, compile_cache=None):
     """Get a Program object for a program
 
     Args:
@@ -87,6 +95,9 @@ def get_program(path, language_config=None, work_dir=None, include_dir=None,
         allow_validation_script (bool): if true, also looks for
             validation scripts in the Checktestdata and VIVA formats.
 
+        compile_cache (CompileCache): compile cache to use for
+            programs given by source code, or None for no caching.
+
     Returns:
         a Program instance, or None if no program was found at
         the given path.
@@ -111,9 +122,22 @@ def get_program(path, language_config=None, work_dir=None, include_dir=None,
         if lang is not None:
             if include_dir is not None:
                 lang_dir = os.path.join(include_dir, lang.lang_id)
-                build = os.path.join(lang_dir, 'build')
-                if os.path.isfile(build) and os.access(build, os.X_OK):
+                if _has_build_script(lang_dir):
                     return BuildRun(path, work_dir=work_dir, include_dir=lang_dir)
 
-            return SourceCode(path, lang, work_dir=work_dir, include_dir=include_dir)
+            return SourceCode(path, lang, work_dir=work_dir, include_dir=include_dir,
+                              compile_cache=compile_cache)
     return None
+
+
+# include directory -> whether it has an executable build script.  The
+# include directories are shared by all submissions of a problem, so
+# only check each of them once.
+_build_scripts: Dict[str, bool] = {}
+
+
+def _has_build_script(lang_dir):
+    if lang_dir not in _build_scripts:
+        build = os.path.join(lang_dir, 'build')
+        _build_scripts[lang_dir] = os.path.isfile(build) and os.access(build, os.X_OK)
+    return _build_scripts[lang_dir]
@@ -36,11 +36,7 @@ class BuildRun(Program):
         if path[-1] == '/':
             path = path[:-1]
         self.name = os.path.basename(path)
-        self.path = os.path.join(work_dir, self.name)
-        if os.path.exists(self.path):
-            self.path = tempfile.mkdtemp(prefix='%s-' % self.name, dir=work_dir)
-        else:
-            os.makedirs(self.path)
+        self.path = rutil.make_work_subdir(work_dir, self.name)
 
         rutil.add_files(path, self.path)
         if include_dir is not None and os.path.isdir(include_dir):
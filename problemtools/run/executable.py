@@ -1,9 +1,9 @@
 """
 Implementation of programs provided by an executable file.
 """
-import os
 from .program import Program
 from .errors import ProgramError
+from . import rutil
 
 class Executable(Program):
     """Class for executable files.
@@ -17,14 +17,17 @@ class Executable(Program):
             args: list of additional command line arguments that
                 should be passed to the program every time it is executed.
         """
-        if not os.path.isfile(path) or not os.access(path, os.X_OK):
+        if not rutil.is_executable_file(path):
             raise ProgramError('%s is not an executable program' % path)
         self.path = path
-        self.args = args if args is not None else []
+        self.args = tuple(args) if args is not None else ()
+        # Neither path nor args change after this, so the command is
+        # only built once
+        self._runcmd = (path,) + self.args
 
     def __str__(self):
         """String representation"""
-        return '%s' % (self.path)
+        return self.path
 
     def compile(self):
         """Dummy implementation of the compile method -- nothing to check!
@@ -34,7 +37,7 @@ class Executable(Program):
     def get_runcmd(self, cwd=None, memlim=None):
         """Command to run the program.
         """
-        return [self.path] + self.args
+        return list(self._runcmd)
 
     def should_skip_memory_rlimit(self):
         """Ugly hack (see program.py for details)."""
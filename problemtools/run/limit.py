@@ -41,12 +41,26 @@ def try_limit(limit, soft, hard):
         soft: soft limit
         hard: hard limit
     """
+    resource.setrlimit(limit, capped_limit(limit, soft, hard))
+
+
+def capped_limit(limit, soft, hard):
+    """Cap an rlimit at the current hard limit for the resource.
+
+    Params:
+        limit: resource to limit (e.g. resource.RLIMIT_CPU)
+        soft: soft limit
+        hard: hard limit
+
+    Returns:
+        pair (soft, hard) that can be passed on to resource.setrlimit
+    """
     (_, cur_hard) = resource.getrlimit(limit)
     if not __limit_less(soft, cur_hard):
         soft = cur_hard
     if not __limit_less(hard, cur_hard):
         hard = cur_hard
-    resource.setrlimit(limit, (soft, hard))
+    return (soft, hard)
 
 
 
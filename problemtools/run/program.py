@@ -1,6 +1,9 @@
 """Abstract base class for programs.
 """
+import concurrent.futures
+import fcntl
 import os
+import sys
 from . import limit
 import resource
 import signal
@@ -10,6 +13,12 @@ from .errors import ProgramError
 
 log = logging.getLogger(__name__)
 
+# Signals whose disposition the Python interpreter changes and which
+# should be reset to default before exec:ing a program (see __run_wait)
+_RESET_SIGNALS = tuple(getattr(signal, name)
+                       for name in ['SIGPIPE', 'SIGXFZ', 'SIGXFSZ']
+                       if hasattr(signal, name))
+
 
 class Program(object):
     """Abstract base class for programs.
@@ -17,7 +26,8 @@ class Program(object):
     runtime = 0
 
     def run(self, infile='/dev/null', outfile='/dev/null', errfile='/dev/null',
-            args=None, timelim=1000, memlim=1024, set_work_dir=False):
+            args=None, timelim=1000, memlim=1024, set_work_dir=False,
+            work_dir=None):
         """Run the program.
 
         Args:
@@ -28,6 +38,9 @@ class Program(object):
                 pass to the program
             timelim (int): CPU time limit in seconds
             memlim (int): memory limit in MB
+            set_work_dir (bool): run the program in its own directory
+            work_dir (str): if not None, run the program in this
+                directory instead of its own (when set_work_dir is set)
 
         Returns:
             pair (status, runtime):
@@ -44,12 +57,40 @@ class Program(object):
 
         status, runtime = self.__run_wait(runcmd + args,
                                           infile, outfile, errfile,
-                                          timelim, memlim, self.path if set_work_dir else None)
+                                          timelim, memlim,
+                                          (work_dir or self.path) if set_work_dir else None)
 
         self.runtime = max(self.runtime, runtime)
 
         return status, runtime
 
+    @staticmethod
+    def compile_many(programs, jobs=1):
+        """Compile several programs concurrently.
+
+        Compilation results are memoized by the compile() method of
+        each program, so after this, callers can go through the
+        programs in order and call compile() to get (and report) the
+        result without recompiling anything.  Errors are left for
+        those calls to raise.  With a single job, this does nothing
+        and the programs are compiled by those calls instead.
+
+        Args:
+            programs (list of Program): programs to compile
+            jobs (int): maximum number of concurrent compilations
+        """
+        def try_compile(program):
+            try:
+                program.compile()
+            except ProgramError:
+                pass
+
+        programs = list(programs)
+        if len(programs) < 2 or jobs < 2:
+            return
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(try_compile, programs))
+
     def code_size(self):
         """Subclasses should override this method with the total size of the
         source code."""
@@ -73,9 +114,44 @@ class Program(object):
 
     @staticmethod
     def __run_wait(argv, infile, outfile, errfile, timelim, memlim, working_directory=None):
-        log.debug('run "%s < %s > %s 2> %s"',
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug('run "%s < %s > %s 2> %s"',
                       ' '.join(argv), infile, outfile, errfile)
-        pid = os.fork()
+        # Note that this can not use os.posix_spawn: the resource limits
+        # and working directory must be in place before the program is
+        # exec:ed, and posix_spawn has no way of setting them.  Instead,
+        # work out the limits before forking to keep the child brief.
+        rlimits = []
+        if timelim is not None:
+            rlimits.append((resource.RLIMIT_CPU,
+                            limit.capped_limit(resource.RLIMIT_CPU, timelim, timelim + 1)))
+        if memlim is not None:
+            rlimits.append((resource.RLIMIT_AS,
+                            limit.capped_limit(resource.RLIMIT_AS, memlim * (1024**2), resource.RLIM_INFINITY)))
+        rlimits.append((resource.RLIMIT_STACK,
+                        limit.capped_limit(resource.RLIMIT_STACK, resource.RLIM_INFINITY, resource.RLIM_INFINITY)))
+        # Likewise, open the files for stdin/stdout/stderr up front, so
+        # that the child only has to dup2 them into place
+        fds = []
+        try:
+            for filename, flags in [(infile, os.O_RDONLY),
+                                    (outfile, os.O_WRONLY | os.O_CREAT | os.O_TRUNC),
+                                    (errfile, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)]:
+                fds.append(Program.__open_above_stdio(filename, flags))
+        except OSError as exc:
+            for fd in fds:
+                os.close(fd)
+            # Report this the same way as a child process that failed
+            # to set itself up: as a program killed by SIGTERM
+            log.error('Failed to open %s when running %s: %s',
+                      exc.filename, argv[0], exc.strerror)
+            return int(signal.SIGTERM), 0.0
+        try:
+            pid = os.fork()
+        except OSError:
+            for fd in fds:
+                os.close(fd)
+            raise
         if pid == 0:  # child
             try:
                 # The Python interpreter internally sets some signal dispositions
@@ -87,41 +163,44 @@ class Program(object):
                 #
                 # This *shouldn't* cause any verdict changes given the setup for
                 # interactive problems, but reset them anyway, for sanity.
-                if hasattr(signal, "SIGPIPE"):
-                    signal.signal(signal.SIGPIPE, signal.SIG_DFL)
-                if hasattr(signal, "SIGXFZ"):
-                    signal.signal(signal.SIGXFZ, signal.SIG_DFL)
-                if hasattr(signal, "SIGXFSZ"):
-                    signal.signal(signal.SIGXFSZ, signal.SIG_DFL)
-
-                if timelim is not None:
-                    limit.try_limit(resource.RLIMIT_CPU, timelim, timelim + 1)
-                if memlim is not None:
-                    limit.try_limit(resource.RLIMIT_AS, memlim * (1024**2), resource.RLIM_INFINITY)
-                limit.try_limit(resource.RLIMIT_STACK,
-                                resource.RLIM_INFINITY, resource.RLIM_INFINITY)
-
-                Program.__setfd(0, infile, os.O_RDONLY)
-                Program.__setfd(1, outfile,
-                                os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
-                Program.__setfd(2, errfile,
-                                os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+                for signum in _RESET_SIGNALS:
+                    signal.signal(signum, signal.SIG_DFL)
+
+                for rlimit, value in rlimits:
+                    resource.setrlimit(rlimit, value)
+
+                for stdio_fd, fd in enumerate(fds):
+                    os.dup2(fd, stdio_fd)
                 if working_directory is not None:
                     os.chdir(working_directory)
                 os.execvp(argv[0], argv)
             except Exception as exc:
-                print("Oops. Fatal error in child process:")
-                print(exc)
+                # stdout may already point at the program's output file,
+                # and the kill below skips flushing Python's buffers
+                print("Oops. Fatal error in child process:", file=sys.stderr)
+                print(exc, file=sys.stderr, flush=True)
                 os.kill(os.getpid(), signal.SIGTERM)
             # Unreachable
             log.error("Unreachable part of run_wait reached")
             os.kill(os.getpid(), signal.SIGTERM)
+        for fd in fds:
+            os.close(fd)
+        # wait4 waits for this specific child and releases the GIL while
+        # blocked, so concurrent runs from several threads (as done by
+        # verifyproblem) each reap their own child with its own rusage.
         (pid, status, rusage) = os.wait4(pid, 0)
         return status, rusage.ru_utime + rusage.ru_stime
 
 
     @staticmethod
-    def __setfd(fd, filename, flag):
-        tmpfd = os.open(filename, flag)
-        os.dup2(tmpfd, fd)
-        os.close(tmpfd)
+    def __open_above_stdio(filename, flag):
+        """Open a file, making sure the descriptor is not one of 0-2
+        (which could happen if the parent has closed one of them), so
+        that it is not clobbered when dup2:ing the files into place.
+        """
+        fd = os.open(filename, flag, 0o666)
+        if fd < 3:
+            newfd = fcntl.fcntl(fd, fcntl.F_DUPFD_CLOEXEC, 3)
+            os.close(fd)
+            fd = newfd
+        return fd
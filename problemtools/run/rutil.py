@@ -1,11 +1,58 @@
 """Some utility functions for the run module.
 """
 import errno
+import itertools
 import os
 import shutil
+import stat
 
 from .errors import ProgramError
 
+def is_executable_file(path):
+    """Check whether path is a regular file that we may execute.
+
+    Args:
+        path (str): path to check.
+
+    Returns:
+        bool, whether path is an executable file.
+    """
+    try:
+        mode = os.stat(path).st_mode
+    except OSError:
+        return False
+    return stat.S_ISREG(mode) and os.access(path, os.X_OK)
+
+
+# Suffixes for work subdirectories whose plain name is already taken
+_subdir_counter = itertools.count(1)
+
+
+def make_work_subdir(work_dir, name):
+    """Create a fresh subdirectory of work_dir for a program.
+
+    The subdirectory is work_dir/name if that does not exist yet, and
+    otherwise work_dir/name-N for the first free N.
+
+    Args:
+        work_dir (str): directory in which to create the subdirectory.
+            Created if it does not exist.
+        name (str): name of the program.
+
+    Returns:
+        str, path of the new directory.
+    """
+    path = os.path.join(work_dir, name)
+    while True:
+        try:
+            os.mkdir(path)
+            return path
+        except FileExistsError:
+            path = os.path.join(work_dir, f'{name}-{next(_subdir_counter)}')
+        except FileNotFoundError:
+            os.makedirs(work_dir, exist_ok=True)
+
+
 def add_files(src, dstdir):
     """Copy src to dstdir.
 
@@ -22,17 +69,21 @@ def add_files(src, dstdir):
     Returns:
         None
     """
+    # Files are copied rather than hard-linked even though that would be
+    # cheaper: programs are compiled and run inside dstdir, and must not
+    # be able to modify the originals.  On Linux, shutil copies file
+    # contents in the kernel (sendfile) anyway.
     try:
         if os.path.isfile(src):
             shutil.copy(src, dstdir)
         else:
-            for name in os.listdir(src):
-                srcfile = os.path.join(src, name)
-                destfile = os.path.join(dstdir, name)
-                if os.path.isdir(srcfile):
-                    shutil.copytree(srcfile, destfile, dirs_exist_ok=True)
-                else:
-                    shutil.copy(srcfile, destfile)
+            with os.scandir(src) as entries:
+                for entry in entries:
+                    destfile = os.path.join(dstdir, entry.name)
+                    if entry.is_dir():
+                        shutil.copytree(entry.path, destfile, dirs_exist_ok=True)
+                    else:
+                        shutil.copy(entry.path, destfile)
     except IOError as exc:
         # FIXME why is this specific error special-cased
         if exc.errno == errno.ENOENT:
@@ -49,6 +100,14 @@ def list_files_recursive(root):
         directory and its subdirectories.
     """
     ret = []
-    for (path, _, files) in os.walk(root):
-        ret.extend([os.path.join(root, path, filename) for filename in files])
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    # Like os.walk, do not descend into symlinked directories
+                    if not entry.is_symlink():
+                        stack.append(entry.path)
+                else:
+                    ret.append(entry.path)
     return ret
@@ -4,6 +4,8 @@ Implementation of programs provided by source code.
 import re
 import os
 import shlex
+import shutil
+import hashlib
 import tempfile
 import logging
 import subprocess
@@ -15,10 +17,72 @@ from . import rutil
 log = logging.getLogger(__name__)
 
 
+def _format_command(template, subs):
+    """Build an argv list from a command template.
+
+    The template is split into words (with shell quoting rules)
+    before substituting, so that paths containing spaces stay
+    single arguments.  A word that is exactly {files} expands to
+    one argument per source file.  Within a larger word, {files}
+    is the source files separated by spaces, and the word is split
+    at those spaces (as all words were before substituting first).
+    """
+    files = subs['files']
+    subs = dict(subs, files=' '.join(files))
+    cmd = []
+    for word in shlex.split(template):
+        if word == '{files}':
+            cmd.extend(files)
+        elif '{files}' in word:
+            cmd.extend(word.format(**subs).split())
+        else:
+            cmd.append(word.format(**subs))
+    return cmd
+
+
+class CompileCache(object):
+    """Where results of successful compilations are kept between runs,
+    keyed by compiler and program contents.
+
+    Shared by the programs of a problem, so that whether to use the
+    cache can be decided after they have been created.
+
+    Attributes:
+        directory (str): cache directory, or None if compilation
+            results should not be reused.
+        max_entries (int): number of compilation results to keep, the
+            least recently used ones are removed beyond that.
+    """
+    default_directory = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+                                     'problemtools', 'compile')
+
+    def __init__(self, directory=None, max_entries=200):
+        self.directory = directory
+        self.max_entries = max_entries
+
+    def prune(self):
+        """Remove the least recently used entries beyond max_entries."""
+        try:
+            with os.scandir(self.directory) as it:
+                entries = [(entry.stat().st_mtime_ns, entry.path) for entry in it
+                           if entry.is_dir() and not entry.name.startswith('.')]
+        except OSError as exc:
+            log.debug('failed to list compile cache %s: %s', self.directory, exc)
+            return
+        entries.sort(reverse=True)
+        for _, path in entries[self.max_entries:]:
+            shutil.rmtree(path, ignore_errors=True)
+
+
 class SourceCode(Program):
     """Class representing a program provided by source code.
     """
-    def __init__(self, path, language, work_dir=None, include_dir=None):
+    _MAIN_RE = re.compile(r'^main\.', re.IGNORECASE)
+    # (include_dir, lang_id) -> language include directory, or None if absent
+    _include_dirs: dict = {}
+
+    def __init__(self, path, language, work_dir=None, include_dir=None,
+                 compile_cache=None):
         """Instantiate SourceCode object
 
         Args:
@@ -38,27 +102,28 @@ class SourceCode(Program):
                 source code for language ID <foo> (e.g. <foo>="cpp"),
                 then the files in include_dir/<foo>/ will be copied
                 into the work_dir along with the source file(s).
+
+            compile_cache (CompileCache): where to reuse and keep
+                compilation results, or None to always compile.
         """
 
         if path[-1] == '/':
             path = path[:-1]
         self.name = os.path.basename(path)
         self.language = language
+        self._compile_cache = compile_cache
 
         # Set up work-space
         if work_dir is None:
             work_dir = tempfile.mkdtemp()
-        self.path = os.path.join(work_dir, self.name)
-        if os.path.exists(self.path):
-            self.path = tempfile.mkdtemp(prefix='%s-' % self.name, dir=work_dir)
-        else:
-            os.makedirs(self.path)
+        self.path = rutil.make_work_subdir(work_dir, self.name)
 
         # Copy all files
         rutil.add_files(path, self.path)
         if include_dir is not None:
-            include_dir = os.path.join(include_dir, self.language.lang_id)
-            if os.path.isdir(include_dir):
+            include_dir = SourceCode.__get_include_dir(include_dir,
+                                                       self.language.lang_id)
+            if include_dir is not None:
                 rutil.add_files(include_dir, self.path)
 
         self.src = sorted(self.language.get_source_files(
@@ -69,8 +134,8 @@ class SourceCode(Program):
                                % (self.language.lang_id, self.name))
 
         self.mainfile = next((x for x in self.src
-                              if re.match(r'^main\.', os.path.basename(x),
-                                          re.IGNORECASE)), None)
+                              if SourceCode._MAIN_RE.match(os.path.basename(x))),
+                             None)
         if self.mainfile is None:
             self.mainfile = self.src[0]
 
@@ -78,6 +143,16 @@ class SourceCode(Program):
         self.Mainclass = self.mainclass[0].upper() + self.mainclass[1:]
 
         self.binary = os.path.join(self.path, 'run')
+        self._runcmds = {}
+
+
+    @staticmethod
+    def __get_include_dir(include_dir, lang_id):
+        key = (include_dir, lang_id)
+        if key not in SourceCode._include_dirs:
+            lang_dir = os.path.join(include_dir, lang_id)
+            SourceCode._include_dirs[key] = lang_dir if os.path.isdir(lang_dir) else None
+        return SourceCode._include_dirs[key]
 
 
     def code_size(self):
@@ -103,22 +178,101 @@ class SourceCode(Program):
         command = self.get_compilecmd()
         compiler = command[0]
 
-        if not os.path.isfile(compiler) or not os.access(compiler, os.X_OK):
-            return (False, '%s does not seem to be installed, expected to find compiler at %s' % (self.language.name, compiler))
+        if not rutil.is_executable_file(compiler):
+            self._compile_result = (False, '%s does not seem to be installed, expected to find compiler at %s' % (self.language.name, compiler))
+            return self._compile_result
+
+        cache_entry = self.__get_cache_entry(compiler)
+        if cache_entry is not None and self.__restore_compiled(cache_entry):
+            log.debug('reusing compiled %s from %s', self.name, cache_entry)
+            self._compile_result = (True, None)
+            return self._compile_result
 
         log.debug('compile command: %s', command)
 
-        try:
-            subprocess.check_output(command, stderr=subprocess.STDOUT)
+        before = self.__stat_files()
+        result = subprocess.run(command, stdin=subprocess.DEVNULL,
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT)
+        if result.returncode == 0:
             self._compile_result = (True, None)
-        except subprocess.CalledProcessError as err:
-            self._compile_result = (False, err.output.decode('utf8', 'replace'))
+            if cache_entry is not None:
+                self.__store_compiled(cache_entry, before)
+        else:
+            self._compile_result = (False, result.stdout.decode('utf8', 'replace'))
 
         return self._compile_result
 
 
+    def __stat_files(self):
+        ret = {}
+        for filename in rutil.list_files_recursive(self.path):
+            stat = os.stat(filename)
+            ret[os.path.relpath(filename, self.path)] = (stat.st_mtime_ns, stat.st_size)
+        return ret
+
+
+    def __get_cache_entry(self, compiler):
+        """Path of the compile cache entry for the current program
+        contents, or None if the compile cache is disabled."""
+        if self._compile_cache is None or self._compile_cache.directory is None:
+            return None
+        digest = hashlib.sha256()
+        compiler_stat = os.stat(compiler)
+        digest.update(f'{self.language.lang_id}\0{self.language.compile}\0'
+                      f'{compiler_stat.st_mtime_ns}\0{compiler_stat.st_size}\0'.encode('utf-8'))
+        for filename in sorted(rutil.list_files_recursive(self.path)):
+            digest.update(os.path.relpath(filename, self.path).encode('utf-8') + b'\0')
+            file_digest = hashlib.sha256()
+            with open(filename, 'rb') as f:
+                while chunk := f.read(64*1024):
+                    file_digest.update(chunk)
+            digest.update(file_digest.digest())
+        return os.path.join(self._compile_cache.directory, digest.hexdigest())
+
+
+    def __restore_compiled(self, cache_entry):
+        if not os.path.isdir(cache_entry):
+            return False
+        try:
+            # Copy rather than link, programs run in (and may write to) self.path
+            shutil.copytree(cache_entry, self.path, dirs_exist_ok=True)
+            # Mark the entry as recently used, for CompileCache.prune
+            os.utime(cache_entry)
+        except OSError as exc:
+            log.debug('failed to restore %s from compile cache: %s', self.name, exc)
+            return False
+        return True
+
+
+    def __store_compiled(self, cache_entry, before):
+        """Save the files that compilation created or changed."""
+        after = self.__stat_files()
+        tmpdir = None
+        try:
+            cache_dir = os.path.dirname(cache_entry)
+            os.makedirs(cache_dir, exist_ok=True)
+            tmpdir = tempfile.mkdtemp(prefix='.tmp', dir=cache_dir)
+            for relpath, stat in after.items():
+                if before.get(relpath) != stat:
+                    dest = os.path.join(tmpdir, relpath)
+                    os.makedirs(os.path.dirname(dest), exist_ok=True)
+                    shutil.copy2(os.path.join(self.path, relpath), dest)
+            # Publish the entry atomically, someone else may be
+            # storing the same entry concurrently
+            os.rename(tmpdir, cache_entry)
+            tmpdir = None
+            self._compile_cache.prune()
+        except OSError as exc:
+            log.debug('failed to store %s in compile cache: %s', self.name, exc)
+        finally:
+            if tmpdir is not None:
+                shutil.rmtree(tmpdir, ignore_errors=True)
+
+
     def get_compilecmd(self):
-        return shlex.split(self.language.compile.format(**self.__get_substitution()))
+        return _format_command(self.language.compile,
+                           self.__get_substitution())
 
 
     def get_runcmd(self, cwd=None, memlim=1024):
@@ -132,12 +286,19 @@ class SourceCode(Program):
                 command line)
         """
         self.compile()
-        subs = self.__get_substitution(memlim)
-        if cwd is not None:
-            subs['path'] = os.path.relpath(subs['path'], cwd)
-            subs['binary'] = os.path.relpath(subs['binary'], cwd)
-            subs['mainfile'] = os.path.relpath(subs['mainfile'], cwd)
-        return shlex.split(self.language.run.format(**subs))
+        # The command only depends on the arguments, and is needed for
+        # every single run of the program
+        key = (cwd, memlim)
+        runcmd = self._runcmds.get(key)
+        if runcmd is None:
+            subs = self.__get_substitution(memlim)
+            if cwd is not None:
+                subs['path'] = os.path.relpath(subs['path'], cwd)
+                subs['binary'] = os.path.relpath(subs['binary'], cwd)
+                subs['mainfile'] = os.path.relpath(subs['mainfile'], cwd)
+            runcmd = tuple(_format_command(self.language.run, subs))
+            self._runcmds[key] = runcmd
+        return list(runcmd)
 
 
     def should_skip_memory_rlimit(self):
@@ -153,7 +314,7 @@ class SourceCode(Program):
     def __get_substitution(self, memlim=1024):
         return {
             'path': self.path,
-            'files': ' '.join(self.src),
+            'files': self.src,
             'memlim': memlim,
             'mainfile': self.mainfile,
             'mainclass': self.mainclass,
@@ -1,5 +1,7 @@
+import functools
 import os
 from .executable import Executable
+from . import rutil
 
 def get_tool_path(name):
     """Find the path to one of problemtools' external tools.
@@ -11,11 +13,11 @@ def get_tool_path(name):
     Returns:
         str, path to the tool, or None if the tool was not found.
     """
-    return __locate_executable([os.path.join(os.path.dirname(__file__),
+    return __locate_executable((os.path.join(os.path.dirname(__file__),
                                              '..', 'support', name),
                                 os.path.join(os.path.dirname(__file__),
                                              '..', '..', 'support',
-                                             os.path.splitext(name)[0], name)])
+                                             os.path.splitext(name)[0], name)))
 
 
 def get_tool(name):
@@ -32,16 +34,20 @@ def get_tool(name):
     return Executable(path) if path is not None else None
 
 
+@functools.lru_cache(maxsize=None)
 def __locate_executable(candidate_paths):
     """Find executable among a set of paths.
 
+    The result is cached for the lifetime of the process, since the
+    same tools are looked up again for every problem checked.
+
     Args:
-        candidate_paths (list of str): list of locations in which to
-            look for an executable file.
+        candidate_paths (tuple of str): locations in which to look for
+            an executable file.
 
     Returns:
         str, first entry of candidate_paths that is an executable
             file, or None if no such entry.
     """
     return next((p for p in candidate_paths
-                 if os.path.isfile(p) and os.access(p, os.X_OK)), None)
+                 if rutil.is_executable_file(p)), None)
@@ -4,6 +4,8 @@ import glob
 import tempfile
 import shutil
 
+_LANGUAGE_RE = re.compile(r'problem\.([a-z][a-z])\.tex$')
+
 
 # For backwards compatibility, remove in bright and shiny future.
 def detect_version(problemdir, problemtex):
@@ -26,7 +28,7 @@ class Template:
         if glob.glob(os.path.join(stmtdir, 'problem.tex')):
             langs.append('')
         for f in glob.glob(os.path.join(stmtdir, 'problem.[a-z][a-z].tex')):
-            langs.append(re.search("problem.([a-z][a-z]).tex$", f).group(1))
+            langs.append(_LANGUAGE_RE.search(f).group(1))
         if len(langs) == 0:
             raise Exception('No problem statements available')
 
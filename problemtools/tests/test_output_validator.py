@@ -1,25 +1,39 @@
 import random
-import pathlib
 import string
-import tempfile
 
 from problemtools.verifyproblem import OutputValidators
 
 
-def test_output_validator_feedback():
+def test_output_validator_feedback(tmp_path):
     r = random.Random(0)
-    with tempfile.TemporaryDirectory() as directory:
-        feedback = pathlib.Path(directory) / "feedback.txt"
-        text = "".join(r.choices(string.printable))
-        feedback.write_text(text)
-        data = OutputValidators._get_feedback(directory)
-        assert text in data
+    feedback = tmp_path / "feedback.txt"
+    text = "".join(r.choices(string.printable))
+    feedback.write_text(text)
+    data = OutputValidators._get_feedback(str(tmp_path))
+    assert text in data
 
 
-def test_output_validator_feedback_non_unicode():
+def test_output_validator_feedback_non_unicode(tmp_path):
     r = random.Random(0)
-    with tempfile.TemporaryDirectory() as directory:
-        feedback = pathlib.Path(directory) / "feedback.txt"
-        feedback.write_bytes(r.randbytes(1024))
-        # Just test that this does not throw an error
-        OutputValidators._get_feedback(directory)
+    feedback = tmp_path / "feedback.txt"
+    feedback.write_bytes(r.randbytes(1024))
+    # Just test that this does not throw an error
+    OutputValidators._get_feedback(str(tmp_path))
+
+
+def test_output_validator_feedback_empty(tmp_path):
+    assert OutputValidators._get_feedback(str(tmp_path)) is None
+    (tmp_path / "judgemessage.txt").write_text("")
+    assert OutputValidators._get_feedback(str(tmp_path)) is None
+
+
+def test_default_validator_accepts_flags():
+    assert OutputValidators._default_validator_accepts_flags([])
+    assert OutputValidators._default_validator_accepts_flags(['case_sensitive', 'space_change_sensitive'])
+    assert OutputValidators._default_validator_accepts_flags(['float_tolerance', '1e-6'])
+    assert OutputValidators._default_validator_accepts_flags(['float_absolute_tolerance', '.5', 'float_relative_tolerance', '-1'])
+    assert not OutputValidators._default_validator_accepts_flags(['unknown_flag'])
+    assert not OutputValidators._default_validator_accepts_flags(['float_tolerance'])
+    assert not OutputValidators._default_validator_accepts_flags(['float_tolerance', 'inf'])
+    assert not OutputValidators._default_validator_accepts_flags(['float_tolerance', '1_0'])
+    assert not OutputValidators._default_validator_accepts_flags(['float_tolerance', '1e999'])
@@ -0,0 +1,22 @@
+import os
+import signal
+
+from problemtools.run import Executable
+
+
+def test_run_missing_infile(tmp_path):
+    status, runtime = Executable('/bin/true').run(infile=str(tmp_path / 'nonexistent'))
+    assert os.WIFSIGNALED(status)
+    assert os.WTERMSIG(status) == signal.SIGTERM
+
+
+def test_run_unwritable_outfile(tmp_path):
+    status, runtime = Executable('/bin/true').run(outfile=str(tmp_path / 'nonexistent' / 'out'))
+    assert os.WIFSIGNALED(status)
+    assert os.WTERMSIG(status) == signal.SIGTERM
+
+
+def test_run_ok(tmp_path):
+    status, runtime = Executable('/bin/true').run(outfile=str(tmp_path / 'out'))
+    assert os.WIFEXITED(status)
+    assert os.WEXITSTATUS(status) == 0
@@ -0,0 +1,37 @@
+import os
+
+from problemtools.run import CompileCache
+from problemtools.run.source import _format_command as format_command
+
+
+def subs(files, path='/tmp/prog'):
+    return {'path': path, 'files': files, 'binary': f'{path}/run', 'memlim': 1024}
+
+
+def test_format_command_files():
+    assert format_command('gcc -o {binary} {files} -lm', subs(['/tmp/prog/a.c', '/tmp/prog/b.c'])) == \
+        ['gcc', '-o', '/tmp/prog/run', '/tmp/prog/a.c', '/tmp/prog/b.c', '-lm']
+
+
+def test_format_command_paths_with_spaces():
+    assert format_command('javac -d {path} {files}', subs(['/tmp/my prog/A.java', '/tmp/my prog/B.java'], path='/tmp/my prog')) == \
+        ['javac', '-d', '/tmp/my prog', '/tmp/my prog/A.java', '/tmp/my prog/B.java']
+
+
+def test_format_command_files_inside_word():
+    assert format_command('tool --src={files} {binary}', subs(['a.c', 'b.c'])) == \
+        ['tool', '--src=a.c', 'b.c', '/tmp/prog/run']
+
+
+def test_format_command_quoted_words():
+    assert format_command('sh -c "exec {binary} --flag" "{files}"', subs(['a.c', 'b.c'])) == \
+        ['sh', '-c', 'exec /tmp/prog/run --flag', 'a.c', 'b.c']
+
+
+def test_compile_cache_prune(tmp_path):
+    for i in range(4):
+        (tmp_path / f'entry{i}').mkdir()
+        os.utime(tmp_path / f'entry{i}', ns=(i * 10**9, i * 10**9))
+    (tmp_path / '.tmpbeingstored').mkdir()
+    CompileCache(str(tmp_path), max_entries=2).prune()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['.tmpbeingstored', 'entry2', 'entry3']
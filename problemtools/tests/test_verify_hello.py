@@ -1,10 +1,11 @@
 import pathlib
 import problemtools.verifyproblem as verify
 
+HELLO_PATH = pathlib.Path(__file__).resolve().parent.parent.parent / "examples" / "hello"
+
 
 def test_load_hello():
-    directory = pathlib.Path(__file__).parent.parent.parent / "examples" / "hello"
-    string = str(directory.resolve())
+    string = str(HELLO_PATH)
 
     args = verify.argparser().parse_args([string])
     verify.initialize_logging(args)
@@ -0,0 +1,68 @@
+import argparse
+import threading
+import time
+
+import problemtools.verifyproblem as verify
+
+
+class FakeTestCase:
+    def __init__(self, index, verdict, runs, lock):
+        self.index = index
+        self.verdict = verdict
+        self.runs = runs
+        self.lock = lock
+        self.aspect = verify.ProblemAspect(f'test.{index}')
+
+    def run_submission(self, sub, args, timelim, timelim_low, timelim_high):
+        # Make the early test cases finish last
+        time.sleep(0.01 * (5 - self.index))
+        self.aspect.info(f'Ran test case {self.index}')
+        with self.lock:
+            self.runs.append(self.index)
+        res = verify.SubmissionResult(self.verdict)
+        res.runtime = self.index
+        return res, res, res
+
+
+def make_group(on_reject):
+    group = verify.TestCaseGroup.__new__(verify.TestCaseGroup)
+    group.config = {'on_reject': on_reject}
+    return group
+
+
+def make_children(verdicts):
+    runs = []
+    lock = threading.Lock()
+    return [FakeTestCase(i, verdict, runs, lock) for i, verdict in enumerate(verdicts)], runs
+
+
+def test_run_children_keeps_order():
+    children, runs = make_children(['AC', 'WA', 'AC', 'AC', 'AC'])
+    group = make_group('continue')
+    args = argparse.Namespace(threads=4)
+    results = list(group._run_children(children, None, args, 1, 1, 2))
+    assert [res.runtime for res, _, _ in results] == [0, 1, 2, 3, 4]
+    assert sorted(runs) == [0, 1, 2, 3, 4]
+
+
+def test_run_children_break_stops_group():
+    children, runs = make_children(['AC', 'WA', 'AC', 'AC', 'AC'])
+    group = make_group('break')
+    args = argparse.Namespace(threads=4)
+    verdicts = []
+    for res, _, _ in group._run_children(children, None, args, 1, 1, 2):
+        verdicts.append(res.verdict)
+        if res.verdict != 'AC':
+            break
+    assert verdicts == ['AC', 'WA']
+    assert runs == [0, 1]
+
+
+def test_run_children_keeps_log_order():
+    children, _ = make_children(['AC', 'WA', 'AC', 'AC', 'AC'])
+    group = make_group('continue')
+    args = argparse.Namespace(threads=4)
+    records = []
+    with verify._buffer_log_records(records):
+        list(group._run_children(children, None, args, 1, 1, 2))
+    assert [msg for _, _, msg, _ in records] == [f'Ran test case {i}' for i in range(5)]
@@ -5,36 +5,48 @@ from __future__ import annotations
 import glob
 import string
 import hashlib
+import importlib.util
+import codecs
 import collections
+import contextlib
+import concurrent.futures
 import os
+import itertools
+import math
+import mmap
 import signal
 import re
 import shutil
 import logging
 import tempfile
 import sys
+import threading
 import copy
+import functools
 import random
 import traceback
 
 import argparse
 import shlex
 
-import yaml
-
 from . import problem2pdf
 from . import problem2html
 
 from . import config
 from . import languages
 from . import run
+from ._version import __version__
 
-from typing import Callable, Literal, Pattern, Match
+from typing import Callable, Iterator, Literal, Pattern, Match
 
 log = logging.getLogger(__name__)
 
 Verdict = Literal['AC', 'TLE', 'OLE', 'MLE', 'RTE', 'WA', 'PAC', 'JE']
 
+_GRADER_OUTPUT_RE = re.compile(r'^((AC)|(WA)|(TLE)|(RTE)|(JE))\s+-?[0-9.]+\s*$')
+_INTERACTIVE_OUTPUT_RE = re.compile(r'\d+ \d+\.\d+ \d+ \d+\.\d+ (validator|submission)')
+_SHORTNAME_RE = re.compile(r'^[a-z0-9]+$')
+
 def is_TLE(status: int, may_signal_with_usr1: bool=False) -> bool:
     return (os.WIFSIGNALED(status) and
             (os.WTERMSIG(status) == signal.SIGXCPU or
@@ -87,6 +99,32 @@ class VerifyError(Exception):
     pass
 
 
+_log_buffer = threading.local()
+
+
+@contextlib.contextmanager
+def _buffer_log_records(records: list) -> Iterator[None]:
+    """Collect the log messages of ProblemAspects in the current thread
+    into records instead of logging them (see _replay_log_records)."""
+    _log_buffer.records = records
+    try:
+        yield
+    finally:
+        _log_buffer.records = None
+
+
+def _replay_log_records(records: list) -> None:
+    """Log records collected by _buffer_log_records, or pass them on
+    to the buffer of the current thread if it has one."""
+    buffered = getattr(_log_buffer, 'records', None)
+    if buffered is not None:
+        buffered.extend(records)
+    else:
+        for logger, level, msg, args in records:
+            logger.log(level, msg, *args)
+    records.clear()
+
+
 class ProblemAspect:
     max_additional_info = 15
     errors = 0
@@ -96,6 +134,8 @@ class ProblemAspect:
     consider_warnings_errors = False
     basename_regex = re.compile('^[a-zA-Z0-9][a-zA-Z0-9_.-]*[a-zA-Z0-9]$')
     consider_warnings_errors: bool
+    # Guards the class-wide counters, submissions are checked concurrently
+    _counter_lock = threading.Lock()
 
     @staticmethod
     def __append_additional_info(msg: str, additional_info: str|None) -> str:
@@ -116,10 +156,18 @@ class ProblemAspect:
     def __init__(self, name):
         self.log = log.getChild(name)
 
+    def _log(self, level: int, msg: str, *args) -> None:
+        records = getattr(_log_buffer, 'records', None)
+        if records is not None:
+            records.append((self.log, level, msg, args))
+        else:
+            self.log.log(level, msg, *args)
+
     def error(self, msg: str, additional_info: str|None=None, *args) -> None:
         self._check_res = False
-        ProblemAspect.errors += 1
-        self.log.error(ProblemAspect.__append_additional_info(msg, additional_info), *args)
+        with ProblemAspect._counter_lock:
+            ProblemAspect.errors += 1
+        self._log(logging.ERROR, ProblemAspect.__append_additional_info(msg, additional_info), *args)
         if ProblemAspect.bail_on_error:
             raise VerifyError(msg)
 
@@ -127,14 +175,15 @@ class ProblemAspect:
         if ProblemAspect.consider_warnings_errors:
             self.error(msg, additional_info, *args)
             return
-        ProblemAspect.warnings += 1
-        self.log.warning(ProblemAspect.__append_additional_info(msg, additional_info), *args)
+        with ProblemAspect._counter_lock:
+            ProblemAspect.warnings += 1
+        self._log(logging.WARNING, ProblemAspect.__append_additional_info(msg, additional_info), *args)
 
     def info(self, msg: str, *args) -> None:
-        self.log.info(msg, *args)
+        self._log(logging.INFO, msg, *args)
 
     def debug(self, msg: str, *args) -> None:
-        self.log.debug(msg, *args)
+        self._log(logging.DEBUG, msg, *args)
 
     def msg(self, msg):
         # TODO Should this be silent?
@@ -158,23 +207,38 @@ class TestCase(ProblemAspect):
         problem.testcase_by_infile[self.infile] = self
 
     def check_newlines(self, filename: str) -> None:
+        # Test data files can be large, so go through them in chunks
+        # rather than decoding all of the file at once.  The bytes for
+        # '\r' and '\n' never occur inside multi-byte UTF-8 sequences,
+        # so they can be looked for in the raw data.
+        decoder = codecs.getincrementaldecoder('utf-8')('strict')
+        has_cr = False
+        last = b''
         with open(filename, 'rb') as f:
-            rawdata = f.read()
             try:
-                data = rawdata.decode('utf-8', 'strict')
+                for buf in iter(lambda: f.read(1 << 20), b''):
+                    decoder.decode(buf)
+                    has_cr = has_cr or b'\r' in buf
+                    last = buf[-1:]
+                decoder.decode(b'', final=True)
             except UnicodeDecodeError:
                 self.warning(f'The file {filename} could not be decoded as utf-8')
                 return
-        if data.find('\r') != -1:
+        if has_cr:
             self.warning(f'The file {filename} contains non-standard line breaks.')
-        if len(data) > 0 and data[-1] != '\n':
+        if last and last != b'\n':
             self.warning(f"The file {filename} does not end with '\\n'.")
 
     def strip_path_prefix(self, path: str) -> str:
         return os.path.relpath(path, os.path.join(self._problem.probdir, 'data'))
 
+    @functools.cached_property
+    def _data_relpath(self) -> str:
+        """Path of the test case (without extension) relative to data/."""
+        return self.strip_path_prefix(self._base)
+
     def is_in_sample_group(self) -> bool:
-        return self.strip_path_prefix(self.infile).startswith('sample')
+        return self._data_relpath.startswith('sample')
 
     def check(self, args: argparse.Namespace) -> bool:
         if self._check_res is not None:
@@ -202,10 +266,10 @@ class TestCase(ProblemAspect):
         return self._check_res
 
     def __str__(self) -> str:
-        return f'test case {self.strip_path_prefix(self._base)}'
+        return f'test case {self._data_relpath}'
 
     def matches_filter(self, filter_re: Pattern[str]) -> bool:
-        return filter_re.search(self.strip_path_prefix(self._base)) is not None
+        return filter_re.search(self._data_relpath) is not None
 
     def set_symlinks(self) -> None:
         if not os.path.islink(self.infile):
@@ -251,40 +315,48 @@ class TestCase(ProblemAspect):
             return self.reuse_result_from._run_submission_real(sub, args, timelim, timelim_low, timelim_high)
 
         cache_key = (sub, args, timelim, timelim_low, timelim_high)
-        if self._result_cache[0] == cache_key:
-            res, res_low, res_high = self._result_cache[1]
+        # Read the cache once, another thread may replace it meanwhile
+        result_cache = self._result_cache
+        if result_cache[0] == cache_key:
+            res, res_low, res_high = result_cache[1]
             return (res, res_low, res_high, True)
 
-        outfile = os.path.join(self._problem.tmpdir, 'output')
-        errfile = os.path.join(self._problem.tmpdir, 'error')
-
-        if sys.stdout.isatty():
-            msg = f'Running {sub} on {self}...'
-            sys.stdout.write(msg)
-            sys.stdout.flush()
-
-        if self._problem.is_interactive:
-            res_high = self._problem.output_validators.validate_interactive(self, sub, timelim_high, self._problem.submissions)
-        else:
-            status, runtime = sub.run(infile=self.infile, outfile=outfile, errfile=errfile,
-                                      timelim=timelim_high+1,
-                                      memlim=self._problem.config.get('limits')['memory'], set_work_dir=True)
-            if is_TLE(status) or runtime > timelim_high:
-                res_high = SubmissionResult('TLE')
-            elif is_RTE(status):
-                try:
-                    with open(errfile, mode="rt") as f:
-                        info = f.read()
-                except IOError:
-                    self.info("Failed to read error file %s", errfile)
-                    info = None
-                res_high = SubmissionResult('RTE', additional_info=info)
+        # Test cases and submissions may run concurrently; bound the number
+        # of programs running at once
+        with self._problem.run_slots:
+            # Give each thread its own files
+            outfile = os.path.join(self._problem.tmpdir, f'output.{threading.get_ident()}')
+            errfile = os.path.join(self._problem.tmpdir, f'error.{threading.get_ident()}')
+
+            show_progress = sys.stdout.isatty() and threading.current_thread() is threading.main_thread()
+            if show_progress:
+                msg = f'Running {sub} on {self}...'
+                sys.stdout.write(msg)
+                sys.stdout.flush()
+
+            if self._problem.is_interactive:
+                res_high = self._problem.output_validators.validate_interactive(self, sub, timelim_high, self._problem.submissions)
             else:
-                res_high = self._problem.output_validators.validate(self, outfile)
-            res_high.runtime = runtime
+                status, runtime = sub.run(infile=self.infile, outfile=outfile, errfile=errfile,
+                                          timelim=timelim_high+1,
+                                          memlim=self._problem.config.get('limits')['memory'],
+                                          set_work_dir=True, work_dir=self._problem.get_run_dir(sub))
+                if is_TLE(status) or runtime > timelim_high:
+                    res_high = SubmissionResult('TLE')
+                elif is_RTE(status):
+                    try:
+                        with open(errfile, mode="rt") as f:
+                            info = f.read()
+                    except IOError:
+                        self.info("Failed to read error file %s", errfile)
+                        info = None
+                    res_high = SubmissionResult('RTE', additional_info=info)
+                else:
+                    res_high = self._problem.output_validators.validate(self, outfile)
+                res_high.runtime = runtime
 
-        if sys.stdout.isatty():
-            sys.stdout.write('\b \b' * (len(msg)))
+            if show_progress:
+                sys.stdout.write('\b \b' * (len(msg)))
         if res_high.runtime <= timelim_low:
             res_low = res_high
             res = res_high
@@ -347,7 +419,7 @@ class TestCaseGroup(ProblemAspect):
         if os.path.isfile(configfile):
             try:
                 with open(configfile) as f:
-                    self.config = yaml.safe_load(f)
+                    self.config = config.safe_load_yaml(f)
             except Exception as e:
                 self.error(str(e))
             if self.config is None:
@@ -382,14 +454,19 @@ class TestCaseGroup(ProblemAspect):
 
         self._items: list[TestCaseGroup|TestCase] = []
         if os.path.isdir(datadir):
-            for filename in sorted(os.listdir(datadir)):
-                filename = os.path.join(datadir, filename)
-                if os.path.isdir(filename):
-                    self._items.append(TestCaseGroup(problem, filename, self))
+            # The directory entries know their own types, so this needs
+            # no stat calls except for symbolic links
+            with os.scandir(datadir) as it:
+                entries = {entry.name: entry for entry in it}
+            for name in sorted(entries):
+                entry = entries[name]
+                if entry.is_dir():
+                    self._items.append(TestCaseGroup(problem, entry.path, self))
                 else:
-                    base, ext = os.path.splitext(filename)
-                    if ext == '.ans' and os.path.isfile(f'{base}.in'):
-                        self._items.append(TestCase(problem, base, self))
+                    base, ext = os.path.splitext(name)
+                    infile = entries.get(f'{base}.in')
+                    if ext == '.ans' and infile is not None and infile.is_file():
+                        self._items.append(TestCase(problem, os.path.join(datadir, base), self))
 
         if not parent:
             self.set_symlinks()
@@ -398,6 +475,14 @@ class TestCaseGroup(ProblemAspect):
     def __str__(self) -> str:
         return f'test case group {self.name}'
 
+    @functools.cached_property
+    def input_validator_flags(self) -> tuple[str, ...]:
+        return tuple(self.config['input_validator_flags'].split())
+
+    @functools.cached_property
+    def output_validator_flags(self) -> list[str]:
+        return self.config['output_validator_flags'].split()
+
     def set_symlinks(self) -> None:
         for sub in self._items:
             sub.set_symlinks()
@@ -431,6 +516,10 @@ class TestCaseGroup(ProblemAspect):
 
 
     def get_score_range(self) -> tuple[float, float]:
+        return self._score_range
+
+    @functools.cached_property
+    def _score_range(self) -> tuple[float, float]:
         try:
             score_range = self.config['range']
             min_score, max_score = list(map(float, score_range.split()))
@@ -504,31 +593,46 @@ class TestCaseGroup(ProblemAspect):
             if not seen_sample:
                 self.warning("No sample data provided")
 
-            hashes = collections.defaultdict(list)
+            # Only files that share their size with another file can be
+            # identical, so only those need to be hashed
+            infiles_by_size = collections.defaultdict(list)
+            size_and_path = []
             for root, dirs, files in os.walk(self._datadir):
                 for filename in files:
                     filepath = os.path.join(root, filename)
                     if filepath.endswith('.in') and not os.path.islink(filepath):
-                        md5 = hashlib.md5()
-                        with open(filepath, 'rb') as f:
-                            for buf in iter(lambda: f.read(1024), b''):
-                                md5.update(buf)
-                        filehash = md5.digest()
-                        hashes[filehash].append(os.path.relpath(filepath, self._problem.probdir))
+                        size = os.path.getsize(filepath)
+                        infiles_by_size[size].append(filepath)
+                        size_and_path.append((size, filepath))
+            hashes = collections.defaultdict(list)
+            for size, filepath in size_and_path:
+                if len(infiles_by_size[size]) > 1:
+                    with open(filepath, 'rb') as f:
+                        if size < 4 * 1024 * 1024:
+                            filehash = hashlib.blake2b(f.read(), digest_size=16)
+                        else:
+                            # Hash large files in one call straight from the page cache
+                            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                                filehash = hashlib.blake2b(mm, digest_size=16)
+                    digest = filehash.digest()
+                    self._problem.input_hashes[filepath] = digest
+                    hashes[digest].append(os.path.relpath(filepath, self._problem.probdir))
             for _, files in hashes.items():
                 if len(files) > 1:
                     self.warning(f"Identical input files: '{str(files)}'")
 
         infiles = glob.glob(os.path.join(self._datadir, '*.in'))
         ansfiles = glob.glob(os.path.join(self._datadir, '*.ans'))
+        infile_set = set(infiles)
+        ansfile_set = set(ansfiles)
 
         for infile in infiles:
             if os.path.isdir(infile): continue
-            if not f'{infile[:-3]}.ans' in ansfiles:
+            if not f'{infile[:-3]}.ans' in ansfile_set:
                 self.error(f"No matching answer file for input '{infile}'")
         for ansfile in ansfiles:
             if os.path.isdir(ansfile): continue
-            if not f'{ansfile[:-4]}.in' in infiles:
+            if not f'{ansfile[:-4]}.in' in infile_set:
                 self.error(f"No matching input file for answer '{ansfile}'")
 
         if not self.get_subgroups() and not self.get_testcases():
@@ -581,10 +685,8 @@ class TestCaseGroup(ProblemAspect):
         subres_high: list[SubmissionResult] = []
         active_low, active = True, True
         on_reject = self.config['on_reject']
-        for child in self._items:
-            if not child.matches_filter(args.data_filter):
-                continue
-            res, res_low, res_high = child.run_submission(sub, args, timelim, timelim_low, timelim_high)
+        children = [child for child in self._items if child.matches_filter(args.data_filter)]
+        for res, res_low, res_high in self._run_children(children, sub, args, timelim, timelim_low, timelim_high):
             subres_high.append(res_high)
             if active:
                 subres.append(res)
@@ -601,17 +703,58 @@ class TestCaseGroup(ProblemAspect):
                 self.aggregate_results(sub, subres_high, shadow_result=True))
 
 
+    def _run_children(self, children: list, sub, args: argparse.Namespace, timelim: int, timelim_low: int, timelim_high: int) -> Iterator[tuple[SubmissionResult, SubmissionResult, SubmissionResult]]:
+        """Run sub on children and yield the results in the order of
+        children.
+
+        If the group continues past rejected test cases, all children
+        are run anyway, so they are run using up to args.threads
+        threads.  If it breaks on the first rejected one, they are run
+        one at a time, so that nothing is run past the break.  The log
+        messages of concurrent runs are held back and passed on in the
+        order of children.
+        """
+        if args.threads <= 1 or len(children) <= 1 or self.config['on_reject'] == 'break':
+            for child in children:
+                yield child.run_submission(sub, args, timelim, timelim_low, timelim_high)
+            return
+
+        def run_child(child, records: list) -> tuple[SubmissionResult, SubmissionResult, SubmissionResult]:
+            with _buffer_log_records(records):
+                return child.run_submission(sub, args, timelim, timelim_low, timelim_high)
+
+        records: list[list] = [[] for _ in children]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(args.threads, len(children))) as executor:
+            futures = [executor.submit(run_child, child, child_records)
+                       for child, child_records in zip(children, records)]
+            try:
+                for future, child_records in zip(futures, records):
+                    try:
+                        result = future.result()
+                    finally:
+                        _replay_log_records(child_records)
+                    yield result
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+
     def aggregate_results(self, sub, sub_results: list[SubmissionResult], shadow_result: bool=False) -> SubmissionResult:
         res = SubmissionResult(None)
 
-        for r in sub_results:
-            if r.runtime > res.runtime:
-                res.runtime = r.runtime
-                res.runtime_testcase = r.runtime_testcase
-            if r.ac_runtime > res.ac_runtime:
-                res.ac_runtime = r.ac_runtime
-                res.ac_runtime_testcase = r.ac_runtime_testcase
-            res.sample_failures.extend(r.sample_failures)
+        if sub_results:
+            # max() picks the first of equally slow results, like a strict
+            # comparison in a loop would
+            slowest = max(sub_results, key=lambda r: r.runtime)
+            if slowest.runtime > res.runtime:
+                res.runtime = slowest.runtime
+                res.runtime_testcase = slowest.runtime_testcase
+            slowest_ac = max(sub_results, key=lambda r: r.ac_runtime)
+            if slowest_ac.ac_runtime > res.ac_runtime:
+                res.ac_runtime = slowest_ac.ac_runtime
+                res.ac_runtime_testcase = slowest_ac.ac_runtime_testcase
+            res.sample_failures = [f for r in sub_results for f in r.sample_failures]
 
         judge_error = next((r for r in sub_results if r.verdict == 'JE'), None)
         if judge_error:
@@ -658,7 +801,7 @@ class ProblemConfig(ProblemAspect):
         if os.path.isfile(self.configfile):
             try:
                 with open(self.configfile) as f:
-                    self._data = yaml.safe_load(f)
+                    self._data = config.safe_load_yaml(f)
                 # Loading empty yaml yields None, for no apparent reason...
                 if self._data is None:
                     self._data = {}
@@ -684,11 +827,13 @@ class ProblemConfig(ProblemAspect):
 
         self._origdata = copy.deepcopy(self._data)
 
-        for field, default in copy.deepcopy(ProblemConfig._OPTIONAL_CONFIG).items():
+        # Only the defaults that end up in the config need copying (the
+        # nested dicts are modified below)
+        for field, default in ProblemConfig._OPTIONAL_CONFIG.items():
             if not field in self._data:
-                self._data[field] = default
+                self._data[field] = copy.deepcopy(default)
             elif isinstance(default, dict) and isinstance(self._data[field], dict):
-                self._data[field] = dict(list(default.items()) + list(self._data[field].items()))
+                self._data[field] = {**default, **self._data[field]}
 
         val = self._data['validation'].split()
         self._data['validation-type'] = val[0]
@@ -755,34 +900,37 @@ class ProblemConfig(ProblemAspect):
         elif self._data['license'] == 'unknown':
             self.warning("License is 'unknown'")
 
-        if self._data['grading']['show_test_data_groups'] not in [True, False]:
-            self.error(f"Invalid value for grading.show_test_data_groups: {self._data['grading']['show_test_data_groups']}")
-        elif self._data['grading']['show_test_data_groups'] and self._data['type'] == 'pass-fail':
+        grading = self._data['grading']
+        if grading['show_test_data_groups'] not in [True, False]:
+            self.error(f"Invalid value for grading.show_test_data_groups: {grading['show_test_data_groups']}")
+        elif grading['show_test_data_groups'] and self._data['type'] == 'pass-fail':
             self.error("Showing test data groups is only supported for scoring problems, this is a pass-fail problem")
         if self._data['type'] != 'pass-fail' and self._problem.testdata.has_custom_groups() and 'show_test_data_groups' not in self._origdata.get('grading', {}):
             self.warning("Problem has custom test case groups, but does not specify a value for grading.show_test_data_groups; defaulting to false")
 
-        if 'on_reject' in self._data['grading']:
-            if self._data['type'] == 'pass-fail' and self._data['grading']['on_reject'] == 'grade':
-                self.error(f"Invalid on_reject policy '{self._data['grading']['on_reject']}' for problem type '{self._data['type']}'")
-            if not self._data['grading']['on_reject'] in ['first_error', 'worst_error', 'grade']:
-                self.error(f"Invalid value '{self._data['grading']['on_reject']}' for on_reject policy")
+        if 'on_reject' in grading:
+            if self._data['type'] == 'pass-fail' and grading['on_reject'] == 'grade':
+                self.error(f"Invalid on_reject policy '{grading['on_reject']}' for problem type '{self._data['type']}'")
+            if not grading['on_reject'] in ['first_error', 'worst_error', 'grade']:
+                self.error(f"Invalid value '{grading['on_reject']}' for on_reject policy")
 
-        if self._data['grading']['objective'] not in ['min', 'max']:
-            self.error(f"Invalid value '{self._data['grading']['objective']}' for objective")
+        if grading['objective'] not in ['min', 'max']:
+            self.error(f"Invalid value '{grading['objective']}' for objective")
 
         for deprecated_grading_key in ['accept_score', 'reject_score', 'range', 'on_reject']:
-            if deprecated_grading_key in self._data['grading']:
+            if deprecated_grading_key in grading:
                 self.warning(f"Grading key '{deprecated_grading_key}' is deprecated in problem.yaml, use '{deprecated_grading_key}' in testdata.yaml instead")
 
-        if not self._data['validation-type'] in ['default', 'custom']:
+        validation_type = self._data['validation-type']
+        validation_params = self._data['validation-params']
+        if not validation_type in ['default', 'custom']:
             self.error(f"Invalid value '{self._data['validation']}' for validation, first word must be 'default' or 'custom'")
 
-        if self._data['validation-type'] == 'default' and len(self._data['validation-params']) > 0:
+        if validation_type == 'default' and len(validation_params) > 0:
             self.error(f"Invalid value '{self._data['validation']}' for validation")
 
-        if self._data['validation-type'] == 'custom':
-            for param in self._data['validation-params']:
+        if validation_type == 'custom':
+            for param in validation_params:
                 if param not in['score', 'interactive']:
                     self.error(f"Invalid parameter '{param}' for custom validation")
 
@@ -808,6 +956,7 @@ class Generators(ProblemAspect):
     _NULLABLE_OPTIONS = ['input', 'solution', 'visualizer']
     _DATA_DIRECTORIES = {'sample', 'secret'}
     _VISUALIZER_EXTENSIONS = ['png', 'jpg', 'jpeg', 'svg', 'interaction', 'desc', 'hint']
+    _TEMPLATE_RE = re.compile(r'\{([^{}]*)\}')
 
     def __init__(self, problem: Problem):
         super().__init__(f"{problem.shortname}.generators")
@@ -819,7 +968,7 @@ class Generators(ProblemAspect):
         if os.path.isfile(self.configfile):
             try:
                 with open(self.configfile) as f:
-                    self._data = yaml.safe_load(f)
+                    self._data = config.safe_load_yaml(f)
                 # Loading empty yaml yields None, for no apparent reason...
                 if self._data is None:
                     self._data = {}
@@ -846,7 +995,10 @@ class Generators(ProblemAspect):
             err()
             return None
 
-        seed = str(int(hashlib.sha512((random_salt + command).encode('utf-8')).hexdigest(), 16) % (2**31))
+        # The low 31 bits of the digest, i.e. the digest interpreted as a
+        # big-endian integer modulo 2**31
+        digest = hashlib.sha512((random_salt + command).encode('utf-8')).digest()
+        seed = str(int.from_bytes(digest[-4:], 'big') & 0x7FFFFFFF)
 
         parts = shlex.split(command)
         if not parts:
@@ -854,24 +1006,21 @@ class Generators(ProblemAspect):
             return None
 
         for i, part in enumerate(parts):
-            new = ''
-            for j, group in enumerate(part.split('{')):
-                if group.count('}') != (0 if j == 0 else 1):
+            # Splitting on the template regex yields literal text at even
+            # indices and the contents of {...} groups at odd indices
+            pieces = Generators._TEMPLATE_RE.split(part)
+            if any('{' in literal or '}' in literal for literal in pieces[::2]):
+                err()
+                return None
+            for j in range(1, len(pieces), 2):
+                if pieces[j].startswith('seed'):
+                    pieces[j] = seed
+                elif pieces[j] == 'name':
+                    pieces[j] = name
+                else:
                     err()
                     return None
-                if j == 0:
-                    new += group
-                else:
-                    group, rest = group.split('}')
-                    if group.startswith('seed'):
-                        new += seed
-                    elif group == 'name':
-                        new += name
-                    else:
-                        err()
-                        return None
-                    new += rest
-            parts[i] = new
+            parts[i] = ''.join(pieces)
 
         program, arguments = parts[0], parts[1:]
         if program not in self._generators:
@@ -886,7 +1035,8 @@ class Generators(ProblemAspect):
             if state[key] is not None:
                 state[key] = self._parse_command(key, state)
 
-    def _parse_directory(self, data: dict, state: dict) -> None:
+    def _parse_directory(self, data: dict, state: dict) -> list[tuple[dict, dict]]:
+        """Returns the (data, state) pairs of the children of the directory, in order"""
         # TODO: Process includes
 
         if 'testdata.yaml' in data:
@@ -896,53 +1046,71 @@ class Generators(ProblemAspect):
 
         cases = data.get('data', {})
         ordered = True
-        if not isinstance(cases, list):
+        if type(cases) is not list:
             ordered = False
             cases = [cases]
 
+        children = []
         case_counter = 0
-        case_format = '%%0%dd' % len(str(len(cases)))
+        if ordered:
+            case_width = len(str(len(cases)))
         for case in cases:
-            if not isinstance(case, dict):
+            if type(case) is not dict:
                 self.error('Path %s/data in generators.yaml must contain a dict or a list of dicts' % state['path'])
                 continue
 
             if ordered:
                 case_counter += 1
 
-            for name, value in sorted(case.items(), key=lambda kv: str(kv[0])):
+            if all(type(key) is str for key in case):
+                items = sorted(case.items())
+            else:
+                items = sorted(case.items(), key=lambda kv: str(kv[0]))
+            for name, value in items:
                 if ordered:
-                    num = case_format % case_counter
+                    num = f'{case_counter:0{case_width}d}'
                     name = num + ('' if name is None else '-' + str(name))
                 else:
                     name = str(name)
 
-                next_state = copy.deepcopy(state)
+                # The state only ever has its values replaced, never mutated,
+                # so a shallow copy suffices
+                next_state = state.copy()
                 next_state['path'] = '%s/%s' % (state['path'], name)
-                self._parse_element(value, next_state)
+                children.append((value, next_state))
+
+        return children
 
     def _parse_element(self, data: dict, state: dict) -> None:
-        if data is None:
-            data = '/%s.in' % state['path']
-            state['manual'] = True
-        if isinstance(data, str):
-            data = { 'input': data }
-        if not isinstance(data, dict):
-            self.error("Path %s in generators.yaml must specify a dict" % state['path'])
-            return
+        # Walk the tree with an explicit stack rather than recursion,
+        # visiting elements in the same depth-first order
+        stack = [(data, state)]
+        while stack:
+            data, state = stack.pop()
+            if data is None:
+                data = '/%s.in' % state['path']
+                state['manual'] = True
+            # The YAML safe loader only produces plain builtin types, so exact
+            # type checks suffice here
+            data_type = type(data)
+            if data_type is str:
+                data = { 'input': data }
+            elif data_type is not dict:
+                self.error("Path %s in generators.yaml must specify a dict" % state['path'])
+                continue
 
-        state.update({
-            key: data[key]
-            for key in Generators._TESTCASE_OPTIONS
-            if key in data
-        })
+            state.update({
+                key: data[key]
+                for key in Generators._TESTCASE_OPTIONS
+                if key in data
+            })
 
-        if data.get('type', 'testcase') == 'testcase':
-            self._parse_testcase(data, state)
-        else:
-            if data['type'] != 'directory':
-                self.error("Type of %s in generators.yaml must be 'directory'" % state['path'])
-            self._parse_directory(data, state)
+            if data.get('type', 'testcase') == 'testcase':
+                self._parse_testcase(data, state)
+            else:
+                if data['type'] != 'directory':
+                    self.error("Type of %s in generators.yaml must be 'directory'" % state['path'])
+                stack.extend(reversed(self._parse_directory(data, state)))
 
     def _resolve_path(self, path: str) -> str:
         base_path = self._problem.probdir
@@ -953,6 +1121,27 @@ class Generators(ProblemAspect):
         return os.path.join(*([base_path] + path.split('/')))
 
     def _compile_generators(self) -> None:
+        # Generators commonly share source directories, so list each
+        # directory once instead of stat'ing every candidate path.
+        # Maps directory -> {entry name: whether entry is a directory}
+        dir_entries: dict[str, dict[str, bool]] = {}
+        def lookup(path: str) -> bool|None:
+            """Returns None if path does not exist, otherwise whether it is a directory"""
+            dirname, basename = os.path.split(path)
+            if dirname not in dir_entries:
+                entries = {}
+                try:
+                    with os.scandir(dirname) as it:
+                        for entry in it:
+                            if entry.is_dir():
+                                entries[entry.name] = True
+                            elif entry.is_file():
+                                entries[entry.name] = False
+                except OSError:
+                    pass
+                dir_entries[dirname] = entries
+            return dir_entries[dirname].get(basename)
+
         for gen, files in list(self._generators.items()):
             implicit = True
             manual = False
@@ -964,7 +1153,7 @@ class Generators(ProblemAspect):
                     manual = True
                     for ext in ['ans'] + Generators._VISUALIZER_EXTENSIONS:
                         other_path = path[:-2] + ext
-                        if os.path.isfile(self._resolve_path(other_path)):
+                        if lookup(self._resolve_path(other_path)) is False:
                             files.append(other_path)
                 # Always add original file last, to ensure it is chosen as
                 # the representative file
@@ -994,15 +1183,16 @@ class Generators(ProblemAspect):
 
                 fpath = self._resolve_path(opath)
                 dest = os.path.join(tmpdir, name)
+                is_dir = lookup(fpath)
                 if os.path.exists(dest):
                     self.error('Duplicate entry for filename %s in generator %s' % (name, gen))
                     ok = False
-                elif not os.path.exists(fpath):
+                elif is_dir is None:
                     self.error('Generator %s does not exist' % opath)
                     ok = False
                 else:
                     try:
-                        if os.path.isdir(fpath):
+                        if is_dir:
                             shutil.copytree(fpath, dest)
                         else:
                             shutil.copy2(fpath, dest)
@@ -1015,7 +1205,8 @@ class Generators(ProblemAspect):
                 else:
                     prog = run.get_program(tmpdir if implicit else dest,
                                         language_config=self._problem.language_config,
-                                        work_dir=self._problem.tmpdir)
+                                        work_dir=self._problem.tmpdir,
+                                        compile_cache=self._problem.compile_cache)
                     if prog is None:
                         self.error('Could not load generator %s' % gen)
                         ok = False
@@ -1083,17 +1274,70 @@ class Generators(ProblemAspect):
         return self._check_res
 
 
+def _list_files_sorted(path: str) -> list[str]:
+    ret: list[str] = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        ret.extend(os.path.join(root, name) for name in sorted(files))
+    return ret
+
+
+def _update_with_file_stats(digest, paths: list[str]) -> None:
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        digest.update(f'{path}\0{st.st_size}\0{st.st_mtime_ns}\0'.encode())
+
+
+@functools.lru_cache(maxsize=None)
+def _statement_tools_digest() -> str:
+    """Hash of the problemtools version and of the path, size and
+    modification time of the templates, problemtools modules, plasTeX
+    installation and pdflatex used to build problem statements."""
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    tool_dirs = [os.path.join(package_dir, 'templates'),
+                 os.path.join(package_dir, '..', 'templates'),
+                 '/usr/lib/problemtools/templates',
+                 os.path.join(package_dir, 'ProblemPlasTeX')]
+    plastex_spec = importlib.util.find_spec('plasTeX')
+    if plastex_spec is not None and plastex_spec.submodule_search_locations:
+        tool_dirs.extend(plastex_spec.submodule_search_locations)
+    paths = []
+    for path in tool_dirs:
+        paths.extend(_list_files_sorted(path))
+    paths.extend(os.path.join(package_dir, name) for name in ['problem2pdf.py', 'problem2html.py', 'template.py'])
+    pdflatex = shutil.which('pdflatex')
+    if pdflatex is not None:
+        paths.append(os.path.realpath(pdflatex))
+    digest = hashlib.sha256(f'{__version__}\0'.encode())
+    _update_with_file_stats(digest, paths)
+    return digest.hexdigest()
+
+
 class ProblemStatement(ProblemAspect):
+    _CONFIG_PATTERNS = [
+        (re.compile(r'\\problemname{(.*)}', re.MULTILINE), 'name'),
+        (re.compile(r'^%%\s*plainproblemname:(.*)$', re.MULTILINE), 'name'),
+    ]
+    _LANGUAGE_RE = re.compile(r'problem.([a-z][a-z]).tex$')
+    # Directory in which statements that were checked without errors are
+    # recorded between runs, keyed by everything that goes into them
+    check_cache_dir = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+                                   'problemtools', 'statement')
+
     def __init__(self, problem: Problem):
         super().__init__(f"{problem.shortname}.statement")
         self.debug('  Loading problem statement')
         self._problem = problem
+        self._statements: dict[str, str] = {}
         self.languages = []
         glob_path = os.path.join(problem.probdir, 'problem_statement', 'problem.')
         if glob.glob(glob_path + 'tex'):
             self.languages.append('')
         for f in glob.glob(glob_path + '[a-z][a-z].tex'):
-            self.languages.append(re.search("problem.([a-z][a-z]).tex$", f).group(1))
+            self.languages.append(ProblemStatement._LANGUAGE_RE.search(f).group(1))
 
     def check(self, args: argparse.Namespace) -> bool:
         if self._check_res is not None:
@@ -1105,7 +1349,16 @@ class ProblemStatement(ProblemAspect):
         if '' in self.languages and 'en' in self.languages:
             self.error("Can't supply both problem.tex and problem.en.tex")
 
+        cache_dir = ProblemStatement.check_cache_dir if args.statement_cache else None
         for lang in self.languages:
+            # Converting the statement is by far the slowest part of the
+            # check, so skip it if the statement has not changed since it
+            # last passed
+            cache_file = self._check_cache_file(cache_dir, lang)
+            if cache_file is not None and os.path.isfile(cache_file):
+                self.info(f'Statement for language "{lang}" unchanged since it last passed, skipping it (see --statement_cache)')
+                continue
+            ok = True
             try:
                 options = problem2pdf.get_parser().parse_args([None])
                 options.problem = self._problem.probdir
@@ -1113,9 +1366,11 @@ class ProblemStatement(ProblemAspect):
                 options.nopdf = True
                 options.quiet = True
                 if not problem2pdf.convert(options):
+                    ok = False
                     langparam = f' --language {lang}' if lang != '' else ''
                     self.error(f'Could not compile problem statement for language "{lang}".  Run problem2pdf{langparam} on the problem to diagnose.')
             except Exception as e:
+                ok = False
                 self.error(f'Error raised when checking problem statement for language {lang}:\n{e}\n{traceback.format_exc()}')
             try:
                 options = problem2html.get_parser().parse_args([None])
@@ -1125,26 +1380,54 @@ class ProblemStatement(ProblemAspect):
                 options.quiet = True
                 problem2html.convert(options)
             except Exception as e:
+                ok = False
                 langparam = f' --language {lang}' if lang != '' else ''
                 self.error(f'Could not convert problem statement to html for language "{lang}".  Run problem2html{langparam} on the problem to diagnose.\n{e}\n{traceback.format_exc()}')
+            if ok and cache_file is not None:
+                try:
+                    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+                    open(cache_file, 'w').close()
+                except OSError as e:
+                    self.debug(f'Failed to record statement check in {cache_file}: {e}')
         return self._check_res
 
+    def _check_cache_file(self, cache_dir: str|None, lang: str) -> str|None:
+        """Path of the file in cache_dir recording that the statement in
+        language lang passed the check, or None if cache_dir is None.
+
+        The name is a hash of the path, size and modification time of
+        everything the statement is built from: the problem_statement
+        directory, the sample data, problem.yaml and a problemset.cls
+        next to the problem, and the tools that build it (see
+        _statement_tools_digest).
+        """
+        if cache_dir is None:
+            return None
+        probdir = self._problem.probdir
+        paths = [os.path.join(probdir, 'problem.yaml'),
+                 os.path.join(os.path.dirname(probdir), 'problemset.cls')]
+        for subdir in ['problem_statement', os.path.join('data', 'sample')]:
+            paths.extend(_list_files_sorted(os.path.join(probdir, subdir)))
+        digest = hashlib.sha256(f'{_statement_tools_digest()}\0{probdir}\0{lang}\0'.encode())
+        _update_with_file_stats(digest, paths)
+        return os.path.join(cache_dir, digest.hexdigest())
+
     def __str__(self) -> str:
         return 'problem statement'
 
+    def _read_statement(self, lang: str) -> str:
+        if lang not in self._statements:
+            filename = f'problem.{lang}.tex' if lang != '' else 'problem.tex'
+            with open(os.path.join(self._problem.probdir, 'problem_statement', filename)) as f:
+                self._statements[lang] = f.read()
+        return self._statements[lang]
+
     def get_config(self) -> dict[str, dict[str, str]]:
         ret: dict[str, dict[str, str]] = {}
         for lang in self.languages:
-            filename = f'problem.{lang}.tex' if lang != '' else 'problem.tex'
-            stmt = open(os.path.join(self._problem.probdir, 'problem_statement', filename)).read()
-            patterns = [
-                (r'\\problemname{(.*)}', 'name'),
-                (r'^%%\s*plainproblemname:(.*)$', 'name'),
-            ]
-            for tup in patterns:
-                pattern = tup[0]
-                dest = tup[1]
-                hit = re.search(pattern, stmt, re.MULTILINE)
+            stmt = self._read_statement(lang)
+            for pattern, dest in ProblemStatement._CONFIG_PATTERNS:
+                hit = pattern.search(stmt)
                 if hit:
                     if not dest in ret:
                         ret[dest] = {}
@@ -1164,8 +1447,13 @@ class Attachments(ProblemAspect):
         super().__init__(f"{problem.shortname}.attachments")
         attachments_path = os.path.join(problem.probdir, 'attachments')
         self.attachments: list[str] = []
+        self._directories: set[str] = set()
         if os.path.isdir(attachments_path):
-            self.attachments = [os.path.join(attachments_path, attachment_name) for attachment_name in os.listdir(attachments_path)]
+            with os.scandir(attachments_path) as entries:
+                for entry in entries:
+                    self.attachments.append(entry.path)
+                    if entry.is_dir():
+                        self._directories.add(entry.path)
 
         self.debug(f'Adding attachments {str(self.attachments)}')
 
@@ -1175,7 +1463,7 @@ class Attachments(ProblemAspect):
         self._check_res = True
 
         for attachment_path in self.attachments:
-            if os.path.isdir(attachment_path):
+            if attachment_path in self._directories:
                 self.error(f'Directories are not allowed as attachments ({attachment_path} is a directory)')
 
         return self._check_res
@@ -1191,9 +1479,9 @@ class Attachments(ProblemAspect):
 
 _JUNK_CASES = [
     ('an empty file', b''),
-    ('a binary file with random bytes', bytearray(random.Random(0).randbytes(1024))),
-    ('a text file with the ASCII characters 32 up to 127', bytearray(x for x in range(32, 127))),
-    ('a random text file with printable ASCII characters', bytearray(random.choice(string.printable.encode('utf8')) for _ in range(200))),
+    ('a binary file with random bytes', random.Random(0).randbytes(1024)),
+    ('a text file with the ASCII characters 32 up to 127', bytes(range(32, 127))),
+    ('a random text file with printable ASCII characters', bytes(random.choices(string.printable.encode('utf8'), k=200))),
 ]
 
 def _build_junk_modifier(desc: str, pattern: str, repl: str|Callable[[Match], str]) -> tuple[str, Callable, Callable[[str], str]]:
@@ -1205,7 +1493,7 @@ _JUNK_MODIFICATIONS = [
     _build_junk_modifier('newlines added where there already are newlines', '\n', lambda m: '\n' * random.randint(2, 5)),
     _build_junk_modifier('leading zeros added to integers', r'(^|[^.]\b)([0-9]+)\b', r'\g<1>0000000000\g<2>'),
     _build_junk_modifier('trailing zeros added to real number decimal portion', r'\.[0-9]+\b', r'\g<0>0000000000'),
-    ('random junk added to the end of the file', lambda f: True, lambda f: f + ''.join(random.choice(string.printable) for _ in range(200))),
+    ('random junk added to the end of the file', lambda f: True, lambda f: f + ''.join(random.choices(string.printable, k=200))),
 ]
 
 class InputFormatValidators(ProblemAspect):
@@ -1224,7 +1512,10 @@ class InputFormatValidators(ProblemAspect):
         self._validators = run.find_programs(input_validators_path,
                                              language_config=problem.language_config,
                                              allow_validation_script=True,
-                                             work_dir=problem.tmpdir)
+                                             work_dir=problem.tmpdir,
+                                             compile_cache=problem.compile_cache)
+        # (input content, flags) -> (exit status, output) of each validator
+        self._validation_results: dict[tuple, list[tuple[int, str|None]]] = {}
 
 
     def __str__(self) -> str:
@@ -1240,6 +1531,7 @@ class InputFormatValidators(ProblemAspect):
         if len(self._validators) == 0:
             self.error('No input format validators found')
 
+        run.Program.compile_many(self._validators, jobs=self._problem.threads)
         for val in self._validators[:]:
             try:
                 success, msg = val.compile()
@@ -1251,33 +1543,37 @@ class InputFormatValidators(ProblemAspect):
 
         # Only sanity check input validators if they all actually compiled
         if self._check_res:
-            all_flags: set = set()
+            # Split the flags once up front; this also makes flag strings
+            # differing only in whitespace collapse into one entry
+            flag_sets: set[tuple[str, ...]] = set()
             def collect_flags(group: TestCaseGroup, flags: set) -> None:
                 if len(group.get_testcases()) > 0:
-                    flags.add(group.config['input_validator_flags'])
+                    flags.add(group.input_validator_flags)
                 for subgroup in group.get_subgroups():
                     collect_flags(subgroup, flags)
-            collect_flags(self._problem.testdata, all_flags)
-
-            fd, file_name = tempfile.mkstemp()
-            os.close(fd)
-            for (desc, case) in _JUNK_CASES:
-                f = open(file_name, "wb")
-                f.write(case)
-                f.close()
-                for flags in all_flags:
-                    flags = flags.split()
-                    for val in self._validators:
-                        status, _ = val.run(file_name, args=flags)
-                        if os.WEXITSTATUS(status) != 42:
-                            break
-                    else:
-                        self.warning(f'No validator rejects {desc} with flags "{" ".join(flags)}"')
-
-            def modified_input_validates(applicable, modifier):
-                for testcase in self._problem.testdata.get_all_testcases():
+            collect_flags(self._problem.testdata, flag_sets)
+            all_flags = [list(flags) for flags in sorted(flag_sets)]
+
+            def validators_accept(file_name: str, flags: list[str]) -> bool:
+                for val in self._validators:
+                    status, _ = val.run(file_name, args=flags)
+                    if os.WEXITSTATUS(status) != 42:
+                        return False
+                return True
+
+            # Every modifier scans the test cases in the same order until it
+            # finds one it applies to, so read each input file at most once
+            testcases = self._problem.testdata.get_all_testcases()
+            infile_contents: dict[str, str] = {}
+            def read_infile(testcase: TestCase) -> str:
+                if testcase.infile not in infile_contents:
                     with open(testcase.infile) as infile:
-                        infile_data = infile.read()
+                        infile_contents[testcase.infile] = infile.read()
+                return infile_contents[testcase.infile]
+
+            def modified_input_validates(file_name, applicable, modifier):
+                for testcase in testcases:
+                    infile_data = read_infile(testcase)
                     if not applicable(infile_data):
                         continue
 
@@ -1285,12 +1581,9 @@ class InputFormatValidators(ProblemAspect):
                         f.write(modifier(infile_data).encode('utf8'))
 
                     for flags in all_flags:
-                        flags = flags.split()
-                        for val in self._validators:
-                            status, _ = val.run(file_name, args=flags)
-                            if os.WEXITSTATUS(status) != 42:
-                                # expected behavior; validator rejects modified input
-                                return False
+                        if not validators_accept(file_name, flags):
+                            # expected behavior; validator rejects modified input
+                            return False
 
                     # we found a file we could modify, and all validators
                     # accepted the modifications
@@ -1299,32 +1592,65 @@ class InputFormatValidators(ProblemAspect):
                 # no files were modifiable
                 return False
 
-            for (desc, applicable, modifier) in _JUNK_MODIFICATIONS:
-                if modified_input_validates(applicable, modifier):
-                    self.warning(f'No validator rejects {desc}')
+            # The validator runs are independent of each other, so run them
+            # in parallel, giving each job its own input file.
+            with tempfile.TemporaryDirectory(prefix='junk', dir=self._problem.tmpdir) as junk_dir, \
+                 concurrent.futures.ThreadPoolExecutor(max_workers=self._problem.threads) as executor:
+                junk_results = []
+                for i, (desc, case) in enumerate(_JUNK_CASES):
+                    file_name = os.path.join(junk_dir, f'junk{i}')
+                    with open(file_name, "wb") as f:
+                        f.write(case)
+                    for flags in all_flags:
+                        junk_results.append((desc, flags, executor.submit(validators_accept, file_name, flags)))
+
+                modified_results = []
+                for i, (desc, applicable, modifier) in enumerate(_JUNK_MODIFICATIONS):
+                    file_name = os.path.join(junk_dir, f'modified{i}')
+                    modified_results.append((desc, executor.submit(modified_input_validates, file_name, applicable, modifier)))
+
+                for (desc, flags, accepted) in junk_results:
+                    if accepted.result():
+                        self.warning(f'No validator rejects {desc} with flags "{" ".join(flags)}"')
 
-            os.unlink(file_name)
+                for (desc, validates) in modified_results:
+                    if validates.result():
+                        self.warning(f'No validator rejects {desc}')
 
         return self._check_res
 
 
     def validate(self, testcase: TestCase) -> None:
-        flags = testcase.testcasegroup.config['input_validator_flags'].split()
+        flags = list(testcase.testcasegroup.input_validator_flags)
         self.check(None)
-        for val in self._validators:
-            with tempfile.NamedTemporaryFile() as outfile, tempfile.NamedTemporaryFile() as errfile:
-                status, _ = val.run(testcase.infile, outfile.name, errfile.name, args=flags)
-                if not os.WIFEXITED(status):
-                    emsg = f'Input format validator {val} crashed on input {testcase.infile}'
-                elif os.WEXITSTATUS(status) != 42:
-                    emsg = f'Input format validator {val} did not accept input {testcase.infile}, exit code: {os.WEXITSTATUS(status)}'
-                else:
-                    continue
-                validator_stdout = outfile.read().decode('utf-8', 'replace')
-                validator_stderr = errfile.read().decode('utf-8', 'replace')
-                validator_output = "\n".join(
-                    out for out in [validator_stdout, validator_stderr] if out)
-                testcase.error(emsg, validator_output)
+        # Identical inputs (symlinked or duplicated test cases) get the
+        # same verdicts, so run the validators only once on each of them.
+        # Inputs are identified by content hash where one was computed when
+        # looking for duplicates, and by resolved path otherwise.
+        realpath = os.path.realpath(testcase.infile)
+        key = (self._problem.input_hashes.get(realpath, realpath), tuple(flags))
+        results = self._validation_results.get(key)
+        if results is None:
+            results = [self._run_validator(val, testcase.infile, flags) for val in self._validators]
+            self._validation_results[key] = results
+        for val, (status, validator_output) in zip(self._validators, results):
+            if not os.WIFEXITED(status):
+                emsg = f'Input format validator {val} crashed on input {testcase.infile}'
+            elif os.WEXITSTATUS(status) != 42:
+                emsg = f'Input format validator {val} did not accept input {testcase.infile}, exit code: {os.WEXITSTATUS(status)}'
+            else:
+                continue
+            testcase.error(emsg, validator_output)
+
+    @staticmethod
+    def _run_validator(val, infile: str, flags: list[str]) -> tuple[int, str|None]:
+        with tempfile.NamedTemporaryFile() as outfile, tempfile.NamedTemporaryFile() as errfile:
+            status, _ = val.run(infile, outfile.name, errfile.name, args=flags)
+            if os.WIFEXITED(status) and os.WEXITSTATUS(status) == 42:
+                return status, None
+            validator_stdout = outfile.read().decode('utf-8', 'replace')
+            validator_stderr = errfile.read().decode('utf-8', 'replace')
+        return status, "\n".join(out for out in [validator_stdout, validator_stderr] if out)
 
 
 class Graders(ProblemAspect):
@@ -1335,7 +1661,10 @@ class Graders(ProblemAspect):
         self._problem = problem
         self._graders: list = run.find_programs(os.path.join(problem.probdir, 'graders'),
                                           language_config=problem.language_config,
-                                          work_dir=problem.tmpdir)
+                                          work_dir=problem.tmpdir,
+                                          compile_cache=problem.compile_cache)
+        # (grader flags, grader input) -> (verdict, score) for the default grader
+        self._grade_cache: dict[tuple[tuple[str, ...], str], tuple[Verdict, float]] = {}
 
     def __str__(self) -> str:
         return 'graders'
@@ -1348,12 +1677,20 @@ class Graders(ProblemAspect):
         if self._problem.config.get('type') == 'pass-fail' and len(self._graders) > 0:
             self.error('There are grader programs but the problem is pass-fail')
 
+        run.Program.compile_many(self._graders, jobs=self._problem.threads)
         for grader in self._graders:
             success, msg = grader.compile()
             if not success:
                 self.error(f'Compile error for {grader}', msg)
         return self._check_res
 
+    def prepare(self) -> None:
+        """Compile the graders, so that they are ready to be used from
+        several threads."""
+        for grader in [self._default_grader] + self._graders:
+            if grader is not None:
+                grader.compile()
+
     def grade(self, sub_results: list[SubmissionResult], testcasegroup: TestCaseGroup, shadow_result: bool=False) -> tuple[Verdict, float|None]:
 
         if testcasegroup.config['grading'] == 'default':
@@ -1362,7 +1699,6 @@ class Graders(ProblemAspect):
             graders = self._graders
 
         grader_input = ''.join([f'{r.verdict} {0 if r.score is None else r.score}\n' for r in sub_results])
-        grader_output_re = r'^((AC)|(WA)|(TLE)|(RTE)|(JE))\s+-?[0-9.]+\s*$'
         verdict: Verdict = 'AC'
         score: float = 0
 
@@ -1374,21 +1710,44 @@ class Graders(ProblemAspect):
         self.debug(f'Grading {len(sub_results)} results:\n{grader_input}')
         self.debug(f'Grader flags: {grader_flags}')
 
+        # The default grader is deterministic, and the same results are
+        # graded over and over (e.g. all test cases accepted, for every
+        # submission and time limit), so only run it once per distinct
+        # input.  Custom graders are not known to be deterministic, so
+        # they are always run.
+        use_cache = testcasegroup.config['grading'] == 'default'
+        cache_key = (tuple(grader_flags), grader_input)
+        cached = self._grade_cache.get(cache_key) if use_cache else None
+        if cached is not None:
+            verdict, score = cached
+            if not shadow_result:
+                self.debug(f'Grade on {testcasegroup} is {verdict} ({score})')
+            return (verdict, score)
+
         for grader in graders:
             if grader is not None and grader.compile()[0]:
-                fd, infile = tempfile.mkstemp()
-                os.close(fd)
-                fd, outfile = tempfile.mkstemp()
-                os.close(fd)
-
-                open(infile, 'w').write(grader_input)
-
-                status, runtime = grader.run(infile, outfile,
-                                             args=grader_flags)
-
-                grader_output = open(outfile, 'r').read()
-                os.remove(infile)
-                os.remove(outfile)
+                infd, infile = tempfile.mkstemp()
+                os.write(infd, grader_input.encode('utf-8'))
+                os.close(infd)
+                outfd, outfile = tempfile.mkstemp()
+                try:
+                    status, runtime = grader.run(infile, outfile,
+                                                 args=grader_flags)
+
+                    # The grader writes to the same inode, so the descriptor
+                    # from mkstemp can be used to read back its output.  Valid
+                    # output is a single short line, so one small read normally
+                    # suffices.
+                    chunks = [os.read(outfd, 4096)]
+                    if len(chunks[0]) == 4096:
+                        # Unusually long output, read the rest of it
+                        while chunks[-1]:
+                            chunks.append(os.read(outfd, 64*1024))
+                finally:
+                    os.close(outfd)
+                    os.remove(infile)
+                    os.remove(outfile)
+                grader_output = b''.join(chunks).decode('utf-8', 'replace')
                 if not os.WIFEXITED(status):
                     self.error(f'Judge error: {grader} crashed')
                     self.debug(f'Grader input:\n{grader_input}')
@@ -1399,15 +1758,17 @@ class Graders(ProblemAspect):
                     self.debug(f'Grader input: {grader_input}\n')
                     return ('JE', None)
 
-                if not re.match(grader_output_re, grader_output):
+                if not _GRADER_OUTPUT_RE.match(grader_output):
                     self.error('Judge error: invalid format of grader output')
-                    self.debug(f'Output must match: "{grader_output_re}"')
+                    self.debug(f'Output must match: "{_GRADER_OUTPUT_RE.pattern}"')
                     self.debug(f'Output was: "{grader_output}"')
                     return ('JE', None)
 
                 verdict, score_str = grader_output.split()
                 score = float(score_str)
         # TODO: check that all graders give same result
+        if use_cache:
+            self._grade_cache[cache_key] = (verdict, score)
 
         if not shadow_result:
             self.debug(f'Grade on {testcasegroup} is {verdict} ({score})')
@@ -1417,6 +1778,12 @@ class Graders(ProblemAspect):
 
 class OutputValidators(ProblemAspect):
     _default_validator = run.get_tool('default_validator')
+    _interactive = run.get_tool('interactive')
+    # Flags understood by the default validator, and the format of the
+    # tolerance values it accepts
+    _DEFAULT_VALIDATOR_FLAGS = frozenset(['case_sensitive', 'space_change_sensitive'])
+    _DEFAULT_VALIDATOR_TOLERANCE_FLAGS = frozenset(['float_absolute_tolerance', 'float_relative_tolerance', 'float_tolerance'])
+    _TOLERANCE_RE = re.compile(r'[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?$')
 
 
     def __init__(self, problem: Problem):
@@ -1425,7 +1792,15 @@ class OutputValidators(ProblemAspect):
         self._validators = run.find_programs(os.path.join(problem.probdir,
                                                           'output_validators'),
                                              language_config=problem.language_config,
-                                             work_dir=problem.tmpdir)
+                                             work_dir=problem.tmpdir,
+                                             compile_cache=problem.compile_cache)
+        # Feedback and validator output directories, reused across runs.
+        # Validation may happen concurrently, so these are per thread.
+        self._scratch = threading.local()
+        # Results of validate() keyed by test case, flags and a digest of
+        # the output, or None if results should not be reused.  Only safe
+        # when the validators are deterministic, so off by default.
+        self.result_cache: dict[tuple, SubmissionResult]|None = None
 
 
     def __str__(self) -> str:
@@ -1451,6 +1826,7 @@ class OutputValidators(ProblemAspect):
         if self._problem.config.get('validation') == 'default' and self._default_validator is None:
             self.error('Unable to locate default validator')
 
+        run.Program.compile_many(self._validators, jobs=self._problem.threads)
         for val in self._validators[:]:
             try:
                 success, msg = val.compile()
@@ -1461,49 +1837,147 @@ class OutputValidators(ProblemAspect):
 
         # Only sanity check output validators if they all actually compiled
         if self._check_res:
-            flags = self._problem.config.get('validator_flags')
-
-            fd, file_name = tempfile.mkstemp()
-            os.close(fd)
-            for (desc, case) in _JUNK_CASES:
-                f = open(file_name, "wb")
-                f.write(case)
-                f.close()
-                rejected = False
-                for testcase in self._problem.testdata.get_all_testcases():
-                    result = self.validate(testcase, file_name)
-                    if result.verdict != 'AC':
-                        rejected = True
-                    if result.verdict == 'JE':
-                        self.error(f'{desc} as output, and output validator flags "{" ".join(flags)}" gave {result}')
-                        break
-                if not rejected:
-                    self.warning(f'{desc} gets AC')
-            os.unlink(file_name)
+            flags = self._validator_flags
+
+            testcases = self._problem.testdata.get_all_testcases()
+            with tempfile.NamedTemporaryFile() as f, \
+                 concurrent.futures.ThreadPoolExecutor(max_workers=self._problem.threads) as executor:
+                for (desc, case) in _JUNK_CASES:
+                    f.seek(0)
+                    f.truncate()
+                    f.write(case)
+                    f.flush()
+                    rejected = False
+                    # Wait for all runs before moving on, since the next case reuses the file
+                    results = list(executor.map(lambda testcase: self.validate(testcase, f.name), testcases))
+                    for result in results:
+                        if result.verdict != 'AC':
+                            rejected = True
+                        if result.verdict == 'JE':
+                            self.error(f'{desc} as output, and output validator flags "{" ".join(flags)}" gave {result}')
+                            break
+                    if not rejected:
+                        self.warning(f'{desc} gets AC')
 
         return self._check_res
 
     @staticmethod
     def _get_feedback(feedback_dir: str) -> str|None:
         all_feedback = []
-        for feedback_file in os.listdir(feedback_dir):
-            feedback_path = os.path.join(feedback_dir, feedback_file)
-            if os.path.getsize(feedback_path) == 0:
-                continue
-            all_feedback.append(f'=== {feedback_file}: ===')
-            # Note: The file could contain non-unicode characters, "replace" to be on the safe side
-            with open(feedback_path, 'r', errors="replace") as feedback:
-                # Cap amount of feedback per file at some high-ish
-                # size, so that a buggy validator spewing out lots of
-                # data doesn't kill us.
-                all_feedback.append(feedback.read(128*1024))
+        with os.scandir(feedback_dir) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                fd = os.open(entry.path, os.O_RDONLY)
+                try:
+                    # Cap amount of feedback per file at some high-ish
+                    # size, so that a buggy validator spewing out lots of
+                    # data doesn't kill us.
+                    data = os.read(fd, 128*1024)
+                finally:
+                    os.close(fd)
+                if not data:
+                    continue
+                all_feedback.append(f'=== {entry.name}: ===')
+                # Note: The file could contain non-unicode characters, "replace" to be on the safe side
+                all_feedback.append(data.decode('utf-8', 'replace'))
         if all_feedback:
             return '\n'.join(all_feedback)
         return None
 
 
+    @functools.cached_property
+    def _validator_flags(self) -> list[str]:
+        return self._problem.config.get('validator_flags').split()
+
+
+    @functools.cached_property
+    def _custom_scoring(self) -> bool:
+        return self._problem.config.get('grading')['custom_scoring']
+
+
+    @functools.cached_property
+    def _accepts_identical_output(self) -> bool:
+        """Whether output identical to the answer file is known to be
+        accepted without running a validator: this is the case when the
+        default validator is the only one and no score is expected."""
+        return self._compiled_validators == (self._default_validator,) and not self._custom_scoring
+
+
+    @staticmethod
+    def _default_validator_accepts_flags(flags: list[str]) -> bool:
+        """Check that the default validator would run with flags rather
+        than fail with a judge error."""
+        i = 0
+        while i < len(flags):
+            if flags[i] in OutputValidators._DEFAULT_VALIDATOR_TOLERANCE_FLAGS:
+                i += 1
+                if (i == len(flags) or not OutputValidators._TOLERANCE_RE.match(flags[i])
+                        or not math.isfinite(float(flags[i]))):
+                    return False
+            elif flags[i] not in OutputValidators._DEFAULT_VALIDATOR_FLAGS:
+                return False
+            i += 1
+        return True
+
+
+    @staticmethod
+    def _file_digest(path: str) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            while chunk := f.read(1 << 20):
+                digest.update(chunk)
+        return digest.digest()
+
+
+    @staticmethod
+    def _copy_result(res: SubmissionResult) -> SubmissionResult:
+        res = copy.copy(res)
+        res.sample_failures = []
+        return res
+
+
+    @staticmethod
+    def _same_contents(path1: str, path2: str) -> bool:
+        try:
+            if os.path.getsize(path1) != os.path.getsize(path2):
+                return False
+            with open(path1, 'rb') as f1, open(path2, 'rb') as f2:
+                while True:
+                    chunk = f1.read(1 << 20)
+                    if chunk != f2.read(1 << 20):
+                        return False
+                    if not chunk:
+                        return True
+        except OSError:
+            return False
+
+
+    @functools.cached_property
+    def _validation_limits(self) -> tuple[int, int]:
+        limits = self._problem.config.get('limits')
+        return limits['validation_time'], limits['validation_memory']
+
+
+    def _scratch_dirs(self) -> tuple[str, str]:
+        dirs = getattr(self._scratch, 'dirs', None)
+        if dirs is None:
+            dirs = (tempfile.mkdtemp(prefix='feedback', dir=self._problem.tmpdir),
+                    tempfile.mkdtemp(prefix='checker_out', dir=self._problem.tmpdir))
+            self._scratch.dirs = dirs
+        else:
+            # Validators may leave anything behind in the feedback directory
+            with os.scandir(dirs[0]) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path)
+                    else:
+                        os.unlink(entry.path)
+        return dirs
+
+
     def _parse_validator_results(self, val, status: int, feedbackdir, testcase: TestCase) -> SubmissionResult:
-        custom_score = self._problem.config.get('grading')['custom_scoring']
+        custom_score = self._custom_scoring
         score = None
         # TODO: would be good to have some way of displaying the feedback for debugging uses
         score_file = os.path.join(feedbackdir, 'score.txt')
@@ -1524,122 +1998,159 @@ class OutputValidators(ProblemAspect):
             return SubmissionResult('WA', additional_info=OutputValidators._get_feedback(feedbackdir))
 
         if custom_score:
-            if os.path.isfile(score_file):
-                try:
-                    score_str = open(score_file).read()
-                    score = float(score_str)
-                except Exception as e:
-                    return SubmissionResult('JE', reason=f'failed to parse validator score: {e}')
-            else:
+            try:
+                with open(score_file, 'rb') as f:
+                    score_str = f.read().decode('utf-8')
+                score = float(score_str)
+            except FileNotFoundError:
                 return SubmissionResult('JE', reason='problem has custom scoring but validator did not produce "score.txt"')
+            except Exception as e:
+                return SubmissionResult('JE', reason=f'failed to parse validator score: {e}')
 
         return SubmissionResult('AC', score=score)
 
 
-    def _actual_validators(self) -> list:
-        vals = self._validators
+    @functools.cached_property
+    def _actual_validators(self) -> tuple:
         if self._problem.config.get('validation') == 'default':
-            vals = [self._default_validator]
-        return vals
+            return (self._default_validator,)
+        return tuple(self._validators)
+
+
+    @functools.cached_property
+    def _compiled_validators(self) -> tuple:
+        # Compile errors are reported by check(), validators that failed
+        # to compile are just skipped during validation
+        return tuple(val for val in self._actual_validators if val is not None and val.compile()[0])
+
+
+    def prepare(self) -> None:
+        """Compile the output validators, so that they are ready to be
+        used from several threads."""
+        self._compiled_validators
 
 
     def validate_interactive(self, testcase: TestCase, submission, timelim: int, errorhandler: Submissions) -> SubmissionResult:
-        interactive_output_re = r'\d+ \d+\.\d+ \d+ \d+\.\d+ (validator|submission)'
         res = SubmissionResult('JE')
-        interactive = run.get_tool('interactive')
+        interactive = OutputValidators._interactive
         if interactive is None:
             errorhandler.error('Could not locate interactive runner')
             return res
+        submission_args = submission.get_runcmd(memlim=self._problem.config.get('limits')['memory'])
+
+        for val in self._compiled_validators:
+            res = self._run_interactive(interactive, val, testcase, submission_args, timelim, errorhandler)
+            if res.verdict != 'AC':
+                return res
+        # TODO: check that all output validators give same result
+        return res
+
+
+    def _run_interactive(self, interactive, val, testcase: TestCase, submission_args: list[str], timelim: int, errorhandler: Submissions) -> SubmissionResult:
+        res = SubmissionResult('JE')
+        _, val_memlim = self._validation_limits
+        feedbackdir, _ = self._scratch_dirs()
         # file descriptor, wall time lim
         initargs = ['1', str(2 * timelim)]
-        validator_args = [testcase.infile, testcase.ansfile, '<feedbackdir>']
-        submission_args = submission.get_runcmd(memlim=self._problem.config.get('limits')['memory'])
+        validator_args = [testcase.infile, testcase.ansfile, feedbackdir + os.sep]
+        # interactive reports a single short line, read it through a pipe
+        # rather than a temporary file
+        read_fd, write_fd = os.pipe()
+        try:
+            i_status, _ = interactive.run(outfile=f'/dev/fd/{write_fd}',
+                                          args=initargs + val.get_runcmd(memlim=val_memlim) + validator_args + [';'] + submission_args)
+            os.close(write_fd)
+            write_fd = -1
+            chunks = []
+            while chunk := os.read(read_fd, 4096):
+                chunks.append(chunk)
+        finally:
+            if write_fd != -1:
+                os.close(write_fd)
+            os.close(read_fd)
+        if is_RTE(i_status):
+            errorhandler.error(f'Interactive crashed, status {i_status}')
+            return res
 
-        val_timelim = self._problem.config.get('limits')['validation_time']
-        val_memlim = self._problem.config.get('limits')['validation_memory']
-        for val in self._actual_validators():
-            if val is not None and val.compile()[0]:
-                feedbackdir = tempfile.mkdtemp(prefix='feedback', dir=self._problem.tmpdir)
-                validator_args[2] = feedbackdir + os.sep
-                f = tempfile.NamedTemporaryFile(delete=False)
-                interactive_out = f.name
-                f.close()
-                i_status, _ = interactive.run(outfile=interactive_out,
-                                              args=initargs + val.get_runcmd(memlim=val_memlim) + validator_args + [';'] + submission_args)
-                if is_RTE(i_status):
-                    errorhandler.error(f'Interactive crashed, status {i_status}')
-                else:
-                    interactive_output = open(interactive_out).read()
-                    errorhandler.debug(f'Interactive output: "{interactive_output}"')
-                    if not re.match(interactive_output_re, interactive_output):
-                        errorhandler.error(f'Output from interactive does not follow expected format, got output "{interactive_output}"')
-                    else:
-                        val_status_str, _, sub_status_str, sub_runtime_str, first = interactive_output.split()
-                        sub_status = int(sub_status_str)
-                        sub_runtime = float(sub_runtime_str)
-                        val_status = int(val_status_str)
-                        val_JE = not os.WIFEXITED(val_status) or os.WEXITSTATUS(val_status) not in [42, 43]
-                        val_WA = os.WIFEXITED(val_status) and os.WEXITSTATUS(val_status) == 43
-                        if val_JE or (val_WA and first == 'validator'):
-                            # If the validator crashed, or exited first with WA,
-                            # always follow validator verdict, even if that early
-                            # exit caused the submission to behave erratically and
-                            # time out.
-                            if sub_runtime > timelim:
-                                sub_runtime = timelim
-                            res = self._parse_validator_results(val, val_status, feedbackdir, testcase)
-                        elif is_TLE(sub_status, True):
-                            res = SubmissionResult('TLE')
-                        elif is_RTE(sub_status):
-                            res = SubmissionResult('RTE')
-                        else:
-                            res = self._parse_validator_results(val, val_status, feedbackdir, testcase)
+        interactive_output = b''.join(chunks).decode('utf-8', 'replace')
+        errorhandler.debug(f'Interactive output: "{interactive_output}"')
+        if not _INTERACTIVE_OUTPUT_RE.match(interactive_output):
+            errorhandler.error(f'Output from interactive does not follow expected format, got output "{interactive_output}"')
+            return res
 
-                        res.runtime = sub_runtime
-                        res.validator_first = (first == 'validator')
+        val_status_str, _, sub_status_str, sub_runtime_str, first = interactive_output.rstrip().split(None, 4)
+        sub_status = int(sub_status_str)
+        sub_runtime = float(sub_runtime_str)
+        val_status = int(val_status_str)
+        val_JE = not os.WIFEXITED(val_status) or os.WEXITSTATUS(val_status) not in [42, 43]
+        val_WA = os.WIFEXITED(val_status) and os.WEXITSTATUS(val_status) == 43
+        if val_JE or (val_WA and first == 'validator'):
+            # If the validator crashed, or exited first with WA,
+            # always follow validator verdict, even if that early
+            # exit caused the submission to behave erratically and
+            # time out.
+            if sub_runtime > timelim:
+                sub_runtime = timelim
+            res = self._parse_validator_results(val, val_status, feedbackdir, testcase)
+        elif is_TLE(sub_status, True):
+            res = SubmissionResult('TLE')
+        elif is_RTE(sub_status):
+            res = SubmissionResult('RTE')
+        else:
+            res = self._parse_validator_results(val, val_status, feedbackdir, testcase)
 
-                os.unlink(interactive_out)
-                shutil.rmtree(feedbackdir)
-                if res.verdict != 'AC':
-                    return res
-        # TODO: check that all output validators give same result
+        res.runtime = sub_runtime
+        res.validator_first = (first == 'validator')
         return res
 
 
     def validate(self, testcase: TestCase, submission_output: str) -> SubmissionResult:
         res = SubmissionResult('JE')
-        val_timelim = self._problem.config.get('limits')['validation_time']
-        val_memlim = self._problem.config.get('limits')['validation_memory']
-        flags = self._problem.config.get('validator_flags').split() + testcase.testcasegroup.config['output_validator_flags'].split()
-        for val in self._actual_validators():
-            if val is not None and val.compile()[0]:
-                feedbackdir = tempfile.mkdtemp(prefix='feedback', dir=self._problem.tmpdir)
-                validator_output = tempfile.mkdtemp(prefix='checker_out', dir=self._problem.tmpdir)
-                outfile = validator_output + "/out.txt"
-                errfile = validator_output + "/err.txt"
-                status, runtime = val.run(submission_output,
-                                          args=[testcase.infile, testcase.ansfile, feedbackdir] + flags,
-                                          timelim=val_timelim, memlim=val_memlim,
-                                          outfile=outfile, errfile=errfile)
-                if self.log.isEnabledFor(logging.DEBUG):
-                    try:
-                        with open(outfile, mode="rt") as f:
-                            output = f.read()
-                        if output:
-                            self.log.debug("Validator output:\n%s", output)
-                        with open(errfile, mode="rt") as f:
-                            error = f.read()
-                        if error:
-                            self.log.debug("Validator stderr:\n%s", error)
-                    except IOError as e:
-                        self.info("Failed to read validator output: %s", e)
-                res = self._parse_validator_results(val, status, feedbackdir, testcase)
-                shutil.rmtree(feedbackdir)
-                shutil.rmtree(validator_output)
-                if res.verdict != 'AC':
-                    return res
+        val_timelim, val_memlim = self._validation_limits
+        flags = self._validator_flags + testcase.testcasegroup.output_validator_flags
+        # The default validator accepts output identical to the answer
+        # file under any flags it understands, so skip starting it
+        if (self._accepts_identical_output
+                and OutputValidators._same_contents(submission_output, testcase.ansfile)
+                and OutputValidators._default_validator_accepts_flags(flags)):
+            return SubmissionResult('AC')
+        result_cache = self.result_cache
+        cache_key = None
+        if result_cache is not None:
+            cache_key = (testcase.infile, testcase.ansfile, tuple(flags),
+                         OutputValidators._file_digest(submission_output))
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                return OutputValidators._copy_result(cached)
+        for val in self._compiled_validators:
+            feedbackdir, validator_output = self._scratch_dirs()
+            outfile = validator_output + "/out.txt"
+            errfile = validator_output + "/err.txt"
+            status, runtime = val.run(submission_output,
+                                      args=[testcase.infile, testcase.ansfile, feedbackdir] + flags,
+                                      timelim=val_timelim, memlim=val_memlim,
+                                      outfile=outfile, errfile=errfile)
+            if self.log.isEnabledFor(logging.DEBUG):
+                try:
+                    with open(outfile, mode="rt") as f:
+                        output = f.read()
+                    if output:
+                        self.debug("Validator output:\n%s", output)
+                    with open(errfile, mode="rt") as f:
+                        error = f.read()
+                    if error:
+                        self.debug("Validator stderr:\n%s", error)
+                except IOError as e:
+                    self.info("Failed to read validator output: %s", e)
+            res = self._parse_validator_results(val, status, feedbackdir, testcase)
+            if res.verdict != 'AC':
+                break
 
         # TODO: check that all output validators give same result
+        # Judge errors may come from validator time or memory limits, so
+        # those are always retried
+        if result_cache is not None and cache_key is not None and res.verdict != 'JE':
+            result_cache[cache_key] = OutputValidators._copy_result(res)
         return res
 
 
@@ -1666,23 +2177,32 @@ class Submissions(ProblemAspect):
                                                        pattern=Submissions._SUB_REGEXP,
                                                        work_dir=problem.tmpdir,
                                                        include_dir=os.path.join(problem.probdir,
-                                                                                    'include'))
+                                                                                    'include'),
+                                                       compile_cache=problem.compile_cache)
 
     def __str__(self) -> str:
         return 'submissions'
 
-    def check_submission(self, sub, args: argparse.Namespace, expected_verdict: Verdict, timelim: int, timelim_low: int, timelim_high: int) -> SubmissionResult:
+    def run_submission(self, sub, args: argparse.Namespace, expected_verdict: Verdict, timelim: int, timelim_low: int, timelim_high: int) -> tuple[SubmissionResult, SubmissionResult, SubmissionResult]:
+        if expected_verdict != 'PAC':
+            # For partially accepted solutions, use the low timelim instead of the real one,
+            # to make sure we have margin in both directions.
+            timelim_low = timelim
+        return self._problem.testdata.run_submission(sub, args, timelim, timelim_low, timelim_high)
+
+    def check_submission(self, sub, args: argparse.Namespace, expected_verdict: Verdict, timelim: int, timelim_low: int, timelim_high: int,
+                         results: tuple[SubmissionResult, SubmissionResult, SubmissionResult]|None=None) -> SubmissionResult:
+        if results is None:
+            results = self.run_submission(sub, args, expected_verdict, timelim, timelim_low, timelim_high)
         desc = f'{expected_verdict} submission {sub}'
         partial = False
         if expected_verdict == 'PAC':
-            # For partially accepted solutions, use the low timelim instead of the real one,
-            # to make sure we have margin in both directions.
             expected_verdict = 'AC'
             partial = True
         else:
             timelim_low = timelim
 
-        result, result_low, result_high = self._problem.testdata.run_submission(sub, args, timelim, timelim_low, timelim_high)
+        result, result_low, result_high = results
 
         if result.verdict == 'AC' and expected_verdict == 'AC' and not partial and result.sample_failures:
             res = result.sample_failures[0]
@@ -1739,6 +2259,10 @@ class Submissions(ProblemAspect):
             timelim = args.fixed_timelim
             timelim_margin = int(round(timelim * safety_margin))
 
+        if args.threads > 1:
+            self._problem.output_validators.prepare()
+            self._problem.graders.prepare()
+
         for verdict in Submissions._VERDICTS:
             acr = verdict[0]
             if verdict[2] and not self._submissions[acr]:
@@ -1746,21 +2270,58 @@ class Submissions(ProblemAspect):
 
             runtimes = []
 
-            for sub in self._submissions[acr]:
-                if args.submission_filter.search(os.path.join(verdict[1], sub.name)):
-                    self.info(f'Check {acr} submission {sub}')
+            subs = [sub for sub in self._submissions[acr]
+                    if args.submission_filter.search(os.path.join(verdict[1], sub.name))]
 
-                    if sub.code_size() > 1024*limits['code']:
-                        self.error(f'{acr} submission {sub} has size {sub.code_size() / 1024.0:.1f} kiB, exceeds code size limit of {limits["code"]} kiB')
-                        continue
+            def compile_and_run(sub) -> tuple[str|None, tuple|None]:
+                if sub.code_size() > 1024*limits['code']:
+                    return None, None
+                success, msg = sub.compile()
+                if not success:
+                    return msg, None
+                return None, self.run_submission(sub, args, acr, timelim, timelim_margin_lo, timelim_margin)
 
-                    success, msg = sub.compile()
-                    if not success:
-                        self.error(f'Compile error for {acr} submission {sub}', additional_info=msg)
-                        continue
+            def compile_and_run_buffered(sub, records: list) -> tuple[str|None, tuple|None]:
+                with _buffer_log_records(records):
+                    return compile_and_run(sub)
+
+            def report(sub, msg: str|None, results: tuple|None) -> None:
+                if sub.code_size() > 1024*limits['code']:
+                    self.error(f'{acr} submission {sub} has size {sub.code_size() / 1024.0:.1f} kiB, exceeds code size limit of {limits["code"]} kiB')
+                    return
+
+                if results is None:
+                    self.error(f'Compile error for {acr} submission {sub}', additional_info=msg)
+                    return
+
+                res = self.check_submission(sub, args, acr, timelim, timelim_margin_lo, timelim_margin, results)
+                runtimes.append(res.runtime)
 
-                    res = self.check_submission(sub, args, acr, timelim, timelim_margin_lo, timelim_margin)
-                    runtimes.append(res.runtime)
+            if args.threads <= 1 or len(subs) <= 1:
+                for sub in subs:
+                    self.info(f'Check {acr} submission {sub}')
+                    report(sub, *compile_and_run(sub))
+            else:
+                # Submissions run concurrently, but their log messages are
+                # held back and reported in order, each after its header
+                records: list[list] = [[] for _ in subs]
+                with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(subs), args.threads)) as executor:
+                    futures = [executor.submit(compile_and_run_buffered, sub, sub_records)
+                               for sub, sub_records in zip(subs, records)]
+                    try:
+                        for sub, future, sub_records in zip(subs, futures, records):
+                            self.info(f'Check {acr} submission {sub}')
+                            try:
+                                outcome = future.result()
+                            finally:
+                                _replay_log_records(sub_records)
+                            report(sub, *outcome)
+                    except BaseException:
+                        # E.g. bailing on the first error, do not start
+                        # any more submissions
+                        for future in futures:
+                            future.cancel()
+                        raise
 
             if acr == 'AC':
                 if len(runtimes) > 0:
@@ -1791,6 +2352,11 @@ class Problem(ProblemAspect):
         self.shortname: str|None = os.path.basename(self.probdir)
         super().__init__(self.shortname)
         self.language_config = languages.load_language_config()
+        # Directory set by check(), the programs are created before that
+        self.compile_cache = run.CompileCache()
+        self.threads = 1
+        self._run_dirs: dict[tuple[str, int], str] = {}
+        self._run_dirs_lock = threading.Lock()
 
     def __enter__(self) -> Problem:
         self.tmpdir = tempfile.mkdtemp(prefix=f'verify-{self.shortname}-')
@@ -1817,6 +2383,8 @@ class Problem(ProblemAspect):
         self.output_validators = OutputValidators(self)
         self.graders = Graders(self)
         self.testcase_by_infile: dict[str, TestCase] = {}
+        # Content hashes of the input files that share their size with another one
+        self.input_hashes: dict[str, bytes] = {}
         self.testdata = TestCaseGroup(self, os.path.join(self.probdir, 'data'))
         self.submissions = Submissions(self)
         self.generators = Generators(self)
@@ -1828,6 +2396,25 @@ class Problem(ProblemAspect):
     def __str__(self) -> str:
         return str(self.shortname)
 
+    def get_run_dir(self, sub) -> str|None:
+        """Directory in which the current thread should run sub, or None
+        to run it in its own directory.
+
+        When submissions may run concurrently, each thread runs them in
+        its own copy of their directory, so that files written by one
+        run are not seen by another one running at the same time.
+        """
+        if self.threads <= 1:
+            return None
+        key = (sub.path, threading.get_ident())
+        with self._run_dirs_lock:
+            run_dir = self._run_dirs.get(key)
+            if run_dir is None:
+                run_dir = tempfile.mkdtemp(prefix='run-', dir=self.tmpdir)
+                shutil.copytree(sub.path, run_dir, dirs_exist_ok=True)
+                self._run_dirs[key] = run_dir
+        return run_dir
+
     def check(self, args: argparse.Namespace) -> tuple[int, int]:
         if self.shortname is None:
             return 1, 0
@@ -1836,6 +2423,10 @@ class Problem(ProblemAspect):
         ProblemAspect.warnings = 0
         ProblemAspect.bail_on_error = args.bail_on_error
         ProblemAspect.consider_warnings_errors = args.werror
+        self.compile_cache.directory = run.CompileCache.default_directory if args.compile_cache else None
+        self.output_validators.result_cache = {} if args.cache_validator_results else None
+        self.threads = args.threads
+        self.run_slots = threading.BoundedSemaphore(args.threads)
 
         try:
             part_mapping: dict[str, list] = {
@@ -1848,7 +2439,7 @@ class Problem(ProblemAspect):
                 'submissions': [self.submissions],
             }
 
-            if not re.match('^[a-z0-9]+$', self.shortname):
+            if not _SHORTNAME_RE.match(self.shortname):
                 self.error(f"Invalid shortname '{self.shortname}' (must be [a-z0-9]+)")
 
             run.limit.check_limit_capabilities(self)
@@ -1876,6 +2467,16 @@ def part_argument(s: str) -> str:
     return s
 
 
+def positive_int_argument(s: str) -> int:
+    try:
+        value = int(s)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{s} is not an integer')
+    if value < 1:
+        raise argparse.ArgumentTypeError(f'{s} is not a positive integer')
+    return value
+
+
 def argparser_basic_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument('-b', '--bail_on_error',
                         action='store_true',
@@ -1889,6 +2490,12 @@ def argparser_basic_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument('--max_additional_info',
                         type=int, default=15,
                         help='maximum number of lines of additional info (e.g. compiler output or validator feedback) to display about an error (set to 0 to disable additional info)')
+    parser.add_argument('--compile_cache',
+                        action='store_true',
+                        help=f'reuse results of earlier compilations of unchanged programs, kept in {run.CompileCache.default_directory}')
+    parser.add_argument('--statement_cache',
+                        action='store_true',
+                        help=f'skip checking problem statements that are unchanged since they last passed (as recorded in {ProblemStatement.check_cache_dir})')
 
 
 def argparser() -> argparse.ArgumentParser:
@@ -1902,6 +2509,12 @@ def argparser() -> argparse.ArgumentParser:
     parser.add_argument('-t', '--fixed_timelim',
                         type=int,
                         help='use this fixed time limit (useful in combination with -d and/or -s when all AC submissions might not be run on all data)')
+    parser.add_argument('-j', '--threads',
+                        type=positive_int_argument, default=1,
+                        help='maximum number of programs to run in parallel')
+    parser.add_argument('--cache_validator_results',
+                        action='store_true',
+                        help='run output validators only once on identical output for the same test case (only safe if the output validators are deterministic)')
     parser.add_argument('-p', '--parts', metavar='PROBLEM_PART',
                         type=part_argument, nargs='+', default=PROBLEM_PARTS,
                         help=f'only test the indicated parts of the problem.  Each PROBLEM_PART can be one of {PROBLEM_PARTS}.')
@@ -1921,19 +2534,63 @@ def initialize_logging(args: argparse.Namespace) -> None:
                         level=eval(f"logging.{args.log_level.upper()}"))
 
 
+def _check_problem(problemdir: str, args: argparse.Namespace) -> int:
+    print(f'Loading problem {os.path.basename(os.path.realpath(problemdir))}')
+    with Problem(problemdir) as prob:
+        errors, warnings = prob.check(args)
+        p = lambda x: '' if x == 1 else 's'
+        print(f'{prob.shortname} tested: {errors} error{p(errors)}, {warnings} warning{p(warnings)}')
+    return errors
+
+
+def _check_problem_captured(problemdir: str, args: argparse.Namespace) -> tuple[bytes, int]:
+    # Runs in a worker process when checking several problems. Everything
+    # written to stdout and stderr is collected and printed by the parent,
+    # so that the output of different problems is not interleaved.
+    with tempfile.TemporaryFile() as output:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        saved_fds = [os.dup(1), os.dup(2)]
+        os.dup2(output.fileno(), 1)
+        os.dup2(output.fileno(), 2)
+        try:
+            errors = _check_problem(problemdir, args)
+        except Exception:
+            # Report the crash along with the rest of the output
+            traceback.print_exc()
+            errors = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved_fds[0], 1)
+            os.dup2(saved_fds[1], 2)
+            for fd in saved_fds:
+                os.close(fd)
+        output.seek(0)
+        return output.read(), errors
+
+
 def main() -> None:
     args = argparser().parse_args()
 
     initialize_logging(args)
 
     total_errors = 0
-    for problemdir in args.problemdir:
-        print(f'Loading problem {os.path.basename(os.path.realpath(problemdir))}')
-        with Problem(problemdir) as prob:
-            errors, warnings = prob.check(args)
-            p = lambda x: '' if x == 1 else 's'
-            print(f'{prob.shortname} tested: {errors} error{p(errors)}, {warnings} warning{p(warnings)}')
-            total_errors += errors
+    if len(args.problemdir) > 1 and args.threads > 1:
+        # Problems are independent, so check them in parallel, sharing
+        # the threads between the problems checked at the same time
+        workers = min(len(args.problemdir), args.threads)
+        worker_args = copy.copy(args)
+        worker_args.threads = args.threads // workers
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                    initializer=initialize_logging, initargs=(args,)) as executor:
+            for output, errors in executor.map(_check_problem_captured, args.problemdir, itertools.repeat(worker_args)):
+                sys.stdout.buffer.write(output)
+                sys.stdout.flush()
+                total_errors += errors
+    else:
+        for problemdir in args.problemdir:
+            total_errors += _check_problem(problemdir, args)
 
     if total_errors > 0:
         sys.exit(1)
@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 
-from setuptools import setup, find_packages
+from setuptools import setup
 from setuptools.command.bdist_egg import bdist_egg as _bdist_egg
 import distutils.cmd
 from distutils.command.build import build as _build
 import os
+import re
 import subprocess
+import sys
 
 
 class BuildSupport(distutils.cmd.Command):
@@ -24,9 +26,51 @@ class BuildSupport(distutils.cmd.Command):
         # FIXME this seems very fragile...
         dest = os.path.join(os.path.realpath(self.distribution.command_obj['build'].build_lib),
                             'problemtools', 'support')
+        if self._is_up_to_date('support', dest):
+            self.announce('build_support: %s is up to date, skipping' % dest,
+                          level=distutils.log.INFO)
+            return
         command = ['make', '-C', 'support', 'install', 'DESTDIR=%s' % dest]
+        # Build the support programs in parallel, unless the caller
+        # already decided on the number of jobs
+        makeflags = os.environ.get('MAKEFLAGS', '')
+        if '-j' not in makeflags and '--jobs' not in makeflags:
+            command.append('-j%d' % (os.cpu_count() or 1))
         self.announce('Running command: %s' % ' '.join(command), level=distutils.log.INFO)
-        subprocess.check_call(command)
+        if self.verbose > 1:
+            subprocess.check_call(command)
+            return
+        # Only show the (long) make output if something went wrong
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            sys.stderr.buffer.write(result.stderr)
+            raise subprocess.CalledProcessError(result.returncode, command)
+
+
+    # Files installed into the destination by support/Makefile
+    _INSTALLED = ['checktestdata', 'default_validator', 'interactive',
+                  'default_grader', 'viva.jar', 'viva.sh']
+
+    @staticmethod
+    def _is_up_to_date(src, dest):
+        """Check whether all support files have been installed into
+        dest after the last change to anything in src."""
+        try:
+            oldest_target = min(os.stat(os.path.join(dest, name)).st_mtime
+                                for name in BuildSupport._INSTALLED)
+        except OSError:
+            return False
+        stack = [src]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.stat().st_mtime >= oldest_target:
+                        return False
+        return True
 
 
 class bdist_egg(_bdist_egg):
@@ -45,20 +89,51 @@ class build(_build):
         _build.run(self)
 
 
+def version_file_is_current(base_dir, version_file):
+    """Check whether version_file was written after the last change of
+    what `git describe` depends on (HEAD, the branch it points to, and
+    the tags), in which case running update_version.py.sh can be
+    skipped."""
+    git_dir = os.path.join(base_dir, '.git')
+    if not os.path.isdir(git_dir):
+        return False
+    deps = [os.path.join(git_dir, 'HEAD'),
+            os.path.join(git_dir, 'packed-refs'),
+            os.path.join(git_dir, 'refs', 'tags')]
+    try:
+        with open(deps[0], 'r') as head:
+            ref = head.read().strip()
+        if ref.startswith('ref: '):
+            deps.append(os.path.join(git_dir, ref[len('ref: '):]))
+        version_mtime = os.stat(version_file).st_mtime
+    except OSError:
+        return False
+    for dep in deps:
+        try:
+            if os.stat(dep).st_mtime >= version_mtime:
+                return False
+        except FileNotFoundError:
+            pass
+    return True
+
+
 def get_version():
     base_dir = os.path.dirname(__file__)
+    version_file = os.path.join(base_dir, 'problemtools', '_version.py')
 
     __version__ = None
-    try:
-        update_script = os.path.join(base_dir, 'admin', 'update_version.py.sh')
-        __version__ = subprocess.check_output([update_script]).decode('utf-8').strip()
-    except:
-        pass
+    if not version_file_is_current(base_dir, version_file):
+        try:
+            update_script = os.path.join(base_dir, 'admin', 'update_version.py.sh')
+            __version__ = subprocess.check_output([update_script]).decode('utf-8').strip()
+        except:
+            pass
 
     if __version__ is None:
-        version_file = os.path.join(base_dir, 'problemtools', '_version.py')
         with open(version_file, 'r') as version_in:
-            exec(version_in.read())
+            match = re.search(r"__version__\s*=\s*'([^']+)'", version_in.read())
+        if match is not None:
+            __version__ = match.group(1)
 
     return __version__
 
@@ -70,7 +145,10 @@ setup(name='problemtools',
       maintainer_email='austrin@kattis.com',
       url='https://github.com/Kattis/problemtools',
       license='MIT',
-      packages=find_packages(),
+      packages=['problemtools',
+                'problemtools.ProblemPlasTeX',
+                'problemtools.run',
+                'problemtools.tests'],
       entry_points = {
           'console_scripts': [
               'verifyproblem=problemtools.verifyproblem:main',